@@ -0,0 +1,257 @@
+import argparse
+import hashlib
+import importlib
+import json
+import sys
+import time
+from core import Canvas, Color, ColorMove, LineCutMove, MergeMove, Move, Orientation, PointCutMove, SwapMove, get_score, parse_isl
+from pathlib import Path
+from PIL import Image
+from typing import Any, Callable, Dict, List, Tuple
+
+TILE_SIZE = 20
+PROGRAM_PAINTERS = [f"v{version}" for version in range(1, 10)]
+
+def get_blank_config(width: int, height: int) -> Dict[str, Any]:
+    return {
+        "width": width,
+        "height": height,
+        "blocks": [{"blockId": "0", "bottomLeft": [0, 0], "topRight": [width, height], "color": [255, 255, 255, 255]}]
+    }
+
+def cut_columns(canvas: Canvas) -> List[str]:
+    column_ids = []
+
+    block_id = "0"
+    for x in range(TILE_SIZE, canvas.width, TILE_SIZE):
+        canvas.apply_move(LineCutMove(block_id, Orientation.VERTICAL, x))
+        column_ids.append(f"{block_id}.0")
+        block_id = f"{block_id}.1"
+
+    column_ids.append(block_id)
+    return column_ids
+
+def cut_tiles(canvas: Canvas) -> List[str]:
+    for column_id in cut_columns(canvas):
+        block_id = column_id
+        for y in range(TILE_SIZE, canvas.height, TILE_SIZE):
+            canvas.apply_move(LineCutMove(block_id, Orientation.HORIZONTAL, y))
+            block_id = f"{block_id}.1"
+
+    return [canvas.get_block_by_pixel(x, y).id for y in range(0, canvas.height, TILE_SIZE) for x in range(0, canvas.width, TILE_SIZE)]
+
+def prepare_line_cuts(canvas: Canvas) -> List[Move]:
+    return [LineCutMove("0" + ".1" * (x - 1), Orientation.VERTICAL, x) for x in range(1, canvas.width)]
+
+def prepare_point_cuts(canvas: Canvas) -> List[Move]:
+    return [PointCutMove("0" + ".2" * (i - 1), i, i) for i in range(1, min(canvas.width, canvas.height))]
+
+def prepare_colors(canvas: Canvas) -> List[Move]:
+    tile_ids = cut_tiles(canvas)
+    return [ColorMove(tile_id, Color(i % 256, (i * 7) % 256, (i * 13) % 256, 255)) for i, tile_id in enumerate(tile_ids * 4)]
+
+def prepare_swaps(canvas: Canvas) -> List[Move]:
+    tile_ids = cut_tiles(canvas)
+    return [SwapMove(tile_ids[i], tile_ids[i + 1]) for i in range(0, len(tile_ids) - 1, 2)]
+
+def prepare_merges(canvas: Canvas) -> List[Move]:
+    column_ids = cut_columns(canvas)
+
+    moves = [MergeMove(column_ids[0], column_ids[1])]
+    for i, column_id in enumerate(column_ids[2:]):
+        moves.append(MergeMove(str(canvas.next_block_id + i), column_id))
+
+    return moves
+
+MOVE_WORKLOADS: Dict[str, Callable[[Canvas], List[Move]]] = {
+    "LineCutMove": prepare_line_cuts,
+    "PointCutMove": prepare_point_cuts,
+    "ColorMove": prepare_colors,
+    "SwapMove": prepare_swaps,
+    "MergeMove": prepare_merges
+}
+
+def benchmark_apply_move(images: List[Tuple[str, Image.Image, Dict[str, Any]]], repeat: int) -> Dict[str, float]:
+    results = {}
+
+    for move_type, prepare in MOVE_WORKLOADS.items():
+        best_time = None
+
+        for _ in range(repeat):
+            total_time = 0
+            total_moves = 0
+
+            for _, image, _ in images:
+                canvas = Canvas(get_blank_config(*image.size), image)
+                moves = prepare(canvas)
+
+                start_time = time.perf_counter()
+                for move in moves:
+                    canvas.apply_move(move)
+                total_time += time.perf_counter() - start_time
+                total_moves += len(moves)
+
+            if best_time is None or total_time / total_moves < best_time:
+                best_time = total_time / total_moves
+
+        results[move_type] = best_time
+
+    return results
+
+def get_program_hash(program_file: Path) -> str:
+    return hashlib.sha256(program_file.read_bytes()).hexdigest()
+
+def benchmark_get_score(images: List[Tuple[str, Image.Image, Dict[str, Any]]], painter_names: List[str], repeat: int) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, str]]]:
+    results = {}
+    program_hashes = {}
+    outputs_root = Path(__file__).parent.parent / "results" / "output"
+
+    for stem, image, initial_config in images:
+        for painter_name in painter_names:
+            program_file = outputs_root / painter_name / f"{stem}.isl"
+            if not program_file.is_file():
+                continue
+
+            moves = [move for _, move in parse_isl(program_file.read_text(encoding="utf-8"))]
+
+            best_time = None
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                get_score(image, initial_config, moves)
+                elapsed_time = time.perf_counter() - start_time
+
+                if best_time is None or elapsed_time < best_time:
+                    best_time = elapsed_time
+
+            results.setdefault(stem, {})[painter_name] = best_time
+            program_hashes.setdefault(stem, {})[painter_name] = get_program_hash(program_file)
+
+    return results, program_hashes
+
+def benchmark_painter(painter_name: str, images: List[Tuple[str, Image.Image, Dict[str, Any]]]) -> Dict[str, float]:
+    painter = importlib.import_module(f"painters.{painter_name}")
+    results = {}
+
+    for stem, image, initial_config in images:
+        start_time = time.perf_counter()
+        painter.run(image, initial_config)
+        results[stem] = time.perf_counter() - start_time
+
+        print(f"{painter_name}/{stem}: {results[stem]:,.3f}s")
+
+    return results
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, path: str = "") -> List[Tuple[str, float, float]]:
+    regressions = []
+
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+
+        if isinstance(value, dict):
+            regressions.extend(find_regressions(value, baseline[key], threshold, f"{path}{key}/"))
+        elif value > baseline[key] * (1 + threshold):
+            regressions.append((f"{path}{key}", baseline[key], value))
+
+    return regressions
+
+def drop_changed_programs(results: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    baseline_hashes = baseline.get("programs", {})
+
+    get_score_results = {}
+    for stem, times in results["get_score"].items():
+        get_score_results[stem] = {painter_name: seconds for painter_name, seconds in times.items()
+                                   if baseline_hashes.get(stem, {}).get(painter_name) == results["programs"][stem][painter_name]}
+
+    return {key: value for key, value in results.items() if key != "programs"} | {"get_score": get_score_results}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the simulator, the scorer and painters.")
+    parser.add_argument("--painters", type=str, nargs="*", default=["v1", "v6"], help="the painters to time (defaults to v1 and v6)")
+    parser.add_argument("--programs", type=str, nargs="*", default=PROGRAM_PAINTERS, help="the painters whose committed programs to score (defaults to v1 to v9)")
+    parser.add_argument("--images", type=int, nargs="*", help="the images to benchmark on (defaults to all images)")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of times to repeat the simulator and scorer benchmarks (defaults to 3)")
+    parser.add_argument("--output", type=Path, help="the file to write the results to (defaults to results/benchmarks/latest.json)")
+    parser.add_argument("--baseline", type=Path, help="the baseline to compare against (defaults to results/benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="the relative slowdown reported as a regression (defaults to 0.1)")
+
+    args = parser.parse_args()
+
+    benchmarks_directory = Path(__file__).parent.parent / "results" / "benchmarks"
+    benchmarks_directory.mkdir(parents=True, exist_ok=True)
+
+    output_file = args.output or benchmarks_directory / "latest.json"
+    baseline_file = args.baseline or benchmarks_directory / "baseline.json"
+
+    input_directory = Path(__file__).parent.parent / "results" / "input"
+    if args.images is not None and len(args.images) > 0:
+        image_files = [input_directory / f"{image}.png" for image in args.images]
+        for image_file in image_files:
+            if not image_file.is_file():
+                raise RuntimeError(f"{image_file} does not exist")
+    else:
+        image_files = sorted(input_directory.glob("*.png"), key=lambda file: int(file.stem))
+
+    images = []
+    for image_file in image_files:
+        image = Image.open(image_file)
+        image.load()
+
+        initial_config = json.loads((image_file.parent / f"{image_file.stem}.json").read_text(encoding="utf-8"))
+        images.append((image_file.stem, image, initial_config))
+
+    get_score_results, program_hashes = benchmark_get_score(images, args.programs, args.repeat)
+
+    results = {
+        "apply_move": benchmark_apply_move(images, args.repeat),
+        "get_score": get_score_results,
+        "programs": program_hashes,
+        "painters": {painter_name: benchmark_painter(painter_name, images) for painter_name in args.painters}
+    }
+
+    for move_type, seconds in results["apply_move"].items():
+        print(f"apply_move {move_type}: {1 / seconds:,.0f} moves/s")
+
+    get_score_times = [seconds for times in results["get_score"].values() for seconds in times.values()]
+    if len(get_score_times) > 0:
+        print(f"get_score: {1000 * sum(get_score_times) / len(get_score_times):,.3f} ms on average over {len(get_score_times):,.0f} programs")
+
+    for painter_name, times in results["painters"].items():
+        print(f"{painter_name}: {sum(times.values()):,.3f}s in total")
+
+    with output_file.open("w+", encoding="utf-8") as file:
+        file.write(json.dumps(results, indent=4))
+
+    print(f"Results: {output_file}")
+
+    if args.save_baseline:
+        with baseline_file.open("w+", encoding="utf-8") as file:
+            file.write(json.dumps(results, indent=4))
+
+        print(f"Baseline: {baseline_file}")
+        return
+
+    if not baseline_file.is_file():
+        print(f"No baseline found at {baseline_file}, run with --save-baseline to store one")
+        return
+
+    baseline = json.loads(baseline_file.read_text(encoding="utf-8"))
+
+    compared_results = drop_changed_programs(results, baseline)
+
+    skipped_programs = len(get_score_times) - sum(len(times) for times in compared_results["get_score"].values())
+    if skipped_programs > 0:
+        print(f"Skipped {skipped_programs:,.0f} get_score programs that differ from the baseline's")
+
+    regressions = find_regressions(compared_results, baseline, args.threshold)
+    for name, baseline_value, value in regressions:
+        print(f"Regression in {name}: {baseline_value:,.6f}s -> {value:,.6f}s ({value / baseline_value - 1:+.0%})")
+
+    if len(regressions) > 0:
+        sys.exit(1)
+
+    print(f"No regressions above {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import json
+import socket
+import sys
+from pathlib import Path
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a painter on the solver daemon.")
+    parser.add_argument("painter", type=str, help="the painter to run")
+    parser.add_argument("--image", type=int, help="the image to run on (defaults to all images)")
+    parser.add_argument("--force", action="store_true", help="rerun the painter on images with cached results")
+    parser.add_argument("--time-budget", type=float, metavar="SECONDS", help="the total number of seconds the painter may spend on all images, implies --force")
+    parser.add_argument("--polish", type=float, default=0, metavar="SECONDS", help="spend this many seconds per image improving the painter's moves with local search and store the results as <painter>-polish, implies --force")
+    parser.add_argument("--socket", type=str, default=str(Path(__file__).parent.parent / "results" / "daemon.sock"), help="the daemon's Unix socket (defaults to results/daemon.sock)")
+
+    args = parser.parse_args()
+
+    request = {
+        "painter": args.painter,
+        "image": args.image,
+        "force": args.force,
+        "time_budget": args.time_budget,
+        "polish": args.polish
+    }
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(args.socket)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise RuntimeError(f"No daemon is listening on {args.socket}, start one with python daemon.py")
+
+        connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        for line in connection.makefile("r", encoding="utf-8"):
+            message = json.loads(line)
+
+            if "error" in message:
+                print(f"Error: {message['error']}")
+                sys.exit(1)
+            elif "total_score" in message:
+                if message["images"] > 1:
+                    print(f"Total score: {message['total_score']:,.0f}")
+            elif message["cached"]:
+                print(f"{message['image']}: {message['score']:,.0f} (cached)")
+            else:
+                print(f"{message['image']}: {message['score']:,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
+import atexit
+import kernels
 import numpy as np
+import os
+import re
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
 from enum import Enum
 from dataclasses import dataclass, field
 from pathlib import Path
 from PIL import Image
-from typing import Any, Dict, List
+from targets import get_target_pixels
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 @dataclass
 class Color:
@@ -65,6 +74,38 @@ class MergeMove(Move):
     def to_isl(self: "MergeMove") -> str:
         return f"merge [{self.block1}] [{self.block2}]"
 
+ISL_PATTERNS = [
+    (re.compile(r"cut\s*\[\s*([\w.]+)\s*\]\s*\[\s*([xy])\s*\]\s*\[\s*(\d+)\s*\]", re.IGNORECASE),
+     lambda match: LineCutMove(match[1], Orientation.VERTICAL if match[2].lower() == "x" else Orientation.HORIZONTAL, int(match[3]))),
+    (re.compile(r"cut\s*\[\s*([\w.]+)\s*\]\s*\[\s*(\d+)\s*,\s*(\d+)\s*\]", re.IGNORECASE),
+     lambda match: PointCutMove(match[1], int(match[2]), int(match[3]))),
+    (re.compile(r"color\s*\[\s*([\w.]+)\s*\]\s*\[\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\]", re.IGNORECASE),
+     lambda match: ColorMove(match[1], Color(int(match[2]), int(match[3]), int(match[4]), int(match[5])))),
+    (re.compile(r"swap\s*\[\s*([\w.]+)\s*\]\s*\[\s*([\w.]+)\s*\]", re.IGNORECASE),
+     lambda match: SwapMove(match[1], match[2])),
+    (re.compile(r"merge\s*\[\s*([\w.]+)\s*\]\s*\[\s*([\w.]+)\s*\]", re.IGNORECASE),
+     lambda match: MergeMove(match[1], match[2]))
+]
+
+def parse_move(line: str) -> Move:
+    for pattern, create_move in ISL_PATTERNS:
+        match = pattern.fullmatch(line.strip())
+        if match is not None:
+            return create_move(match)
+
+    raise ValueError(f"Invalid instruction: {line.strip()}")
+
+def parse_isl(text: str) -> Iterator[Tuple[int, Move]]:
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+
+        try:
+            yield line_number, parse_move(line)
+        except ValueError as e:
+            raise ValueError(f"{e} (line {line_number})") from e
+
 @dataclass
 class Block:
     id: str
@@ -73,27 +114,176 @@ class Block:
     width: int
     height: int
     size: int = field(init=False)
+    handle: int = -1
 
     def __post_init__(self: "Block") -> None:
         self.size = self.width * self.height
 
+BLOCK_RECORD = np.dtype([("x", np.int32), ("y", np.int32), ("width", np.int32), ("height", np.int32),
+                         ("parent", np.int32), ("index", np.int8), ("alive", np.bool_)])
+
+class BlockStore(Mapping):
+    def __init__(self: "BlockStore", capacity: int = 64) -> None:
+        self.records = np.zeros(capacity, dtype=BLOCK_RECORD)
+        self.children = np.full((capacity, 4), -1, dtype=np.int32)
+        self.count = 0
+        self.alive_count = 0
+
+        self.ids = {}
+        self.handles = {}
+
+    def __getitem__(self: "BlockStore", id: str) -> Block:
+        return self.get_block(self.get_handle(id))
+
+    def __iter__(self: "BlockStore") -> Iterator[str]:
+        return (self.get_id(handle) for handle in self.get_alive())
+
+    def __len__(self: "BlockStore") -> int:
+        return self.alive_count
+
+    def add(self: "BlockStore", x: int, y: int, width: int, height: int, parent: int = -1, index: int = -1, id: Optional[str] = None) -> int:
+        if self.count == len(self.records):
+            self.records = np.concatenate([self.records, np.zeros(len(self.records), dtype=BLOCK_RECORD)])
+            self.children = np.concatenate([self.children, np.full(self.children.shape, -1, dtype=np.int32)])
+
+        handle = self.count
+        self.records[handle] = (x, y, width, height, parent, index, True)
+        self.count += 1
+        self.alive_count += 1
+
+        if parent == -1:
+            self.ids[handle] = id
+            self.handles[id] = handle
+        else:
+            self.children[parent, index] = handle
+
+        return handle
+
+    def pop(self: "BlockStore") -> None:
+        self.count -= 1
+        self.alive_count -= 1
+
+        handle = self.count
+        parent, index = self.records[handle]["parent"], self.records[handle]["index"]
+        if parent != -1:
+            self.children[parent, index] = -1
+
+        id = self.ids.pop(handle, None)
+        if id is not None:
+            self.handles.pop(id)
+
+    def remove(self: "BlockStore", handle: int) -> None:
+        self.records[handle]["alive"] = False
+        self.alive_count -= 1
+
+    def restore(self: "BlockStore", handle: int) -> None:
+        self.records[handle]["alive"] = True
+        self.alive_count += 1
+
+    def move(self: "BlockStore", handle: int, x: int, y: int) -> None:
+        self.records[handle]["x"] = x
+        self.records[handle]["y"] = y
+
+    def is_alive(self: "BlockStore", handle: int) -> bool:
+        return 0 <= handle < self.count and bool(self.records[handle]["alive"])
+
+    def get_alive(self: "BlockStore") -> np.ndarray:
+        return np.flatnonzero(self.records["alive"][:self.count])
+
+    def get_id(self: "BlockStore", handle: int) -> str:
+        if handle in self.ids:
+            return self.ids[handle]
+
+        parent, index = self.records[handle]["parent"], self.records[handle]["index"]
+        id = f"{self.get_id(parent)}.{index}"
+
+        self.ids[handle] = id
+        self.handles[id] = handle
+        return id
+
+    def get_handle(self: "BlockStore", id: str) -> int:
+        handle = self.handles.get(id)
+
+        if handle is None:
+            parts = []
+            prefix = id
+            while handle is None and "." in prefix:
+                prefix, part = prefix.rsplit(".", 1)
+                parts.append(part)
+                handle = self.handles.get(prefix)
+
+            for part in reversed(parts):
+                if handle is None or handle == -1 or part not in ("0", "1", "2", "3"):
+                    raise KeyError(id)
+
+                handle = int(self.children[handle, int(part)])
+
+            if handle is None or handle == -1:
+                raise KeyError(id)
+
+            self.ids[handle] = id
+            self.handles[id] = handle
+
+        if not self.records[handle]["alive"]:
+            raise KeyError(id)
+
+        return handle
+
+    def get_block(self: "BlockStore", handle: int) -> Block:
+        x, y, width, height, _, _, _ = self.records[handle].item()
+        return Block(self.get_id(handle), x, y, width, height, handle)
+
+    def get_overlapping(self: "BlockStore", x: int, y: int, width: int, height: int) -> np.ndarray:
+        records = self.records[:self.count]
+        return np.flatnonzero(records["alive"]
+                              & (records["x"] < x + width) & (records["x"] + records["width"] > x)
+                              & (records["y"] < y + height) & (records["y"] + records["height"] > y))
+
+def get_distances(pixels: np.ndarray, target_pixels: np.ndarray) -> np.ndarray:
+    return np.sqrt(((pixels.astype(np.int32) - target_pixels.astype(np.int32)) ** 2).sum(axis=2))
+
+def get_color_distances(pixels: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    differences = pixels.reshape(-1, 1, 4).astype(np.int32) - colors.reshape(1, -1, 4).astype(np.int32)
+    return np.sqrt((differences ** 2).sum(axis=2)).sum(axis=0)
+
 class Canvas:
-    def __init__(self: "Canvas", initial_config: Dict[str, Any]) -> None:
+    def __init__(self: "Canvas", initial_config: Dict[str, Any], target_image: Optional[Image.Image] = None) -> None:
         self.width = initial_config["width"]
         self.height = initial_config["height"]
         self.size = self.width * self.height
 
         self.pixels = np.full((self.height, self.width, 4), 255, dtype=np.uint8)
+        self.target_pixels = None
+        self.cost = 0
+
+        self.checkpoints = []
+        self.undo_log = []
+
+        self.blocks = BlockStore(max(64, 2 * len(initial_config["blocks"])))
+        self.block_owners = np.full((self.height, self.width), -1, dtype=np.int32)
 
-        self.blocks = {}
         for block in initial_config["blocks"]:
-            new_block = Block(block["blockId"],
-                              block["bottomLeft"][0], block["bottomLeft"][1],
-                              block["topRight"][0] - block["bottomLeft"][0], block["topRight"][1] - block["bottomLeft"][1])
-            self.add_block(new_block)
-            self.apply_move(ColorMove(new_block.id, Color(*block["color"])))
+            self.add_block(block["bottomLeft"][0], block["bottomLeft"][1],
+                           block["topRight"][0] - block["bottomLeft"][0], block["topRight"][1] - block["bottomLeft"][1],
+                           id=block["blockId"])
+            self.apply_move(ColorMove(block["blockId"], Color(*block["color"])))
 
         self.next_block_id = len(self.blocks)
+        self.cost = 0
+
+        if target_image is not None:
+            self.target_pixels = get_target_pixels(target_image)
+            self.distances = get_distances(self.pixels, self.target_pixels)
+            self.distance_sum = self.distances.sum()
+
+    def __deepcopy__(self: "Canvas", memo: Dict[int, Any]) -> "Canvas":
+        canvas = Canvas.__new__(Canvas)
+        memo[id(self)] = canvas
+
+        for key, value in self.__dict__.items():
+            setattr(canvas, key, value if key == "target_pixels" else deepcopy(value, memo))
+
+        return canvas
 
     def apply_move(self: "Canvas", move: Move) -> int:
         if isinstance(move, LineCutMove):
@@ -103,40 +293,45 @@ class Canvas:
                 if move.line <= block.x or move.line >= block.x + block.width:
                     raise ValueError(f"Cut coordinates are outside the block")
 
-                self.add_block(Block(f"{block.id}.0", block.x, block.y, move.line - block.x, block.height))
-                self.add_block(Block(f"{block.id}.1", move.line, block.y, block.width - (move.line - block.x), block.height))
+                self.add_block(block.x, block.y, move.line - block.x, block.height, block.handle, 0)
+                self.add_block(move.line, block.y, block.width - (move.line - block.x), block.height, block.handle, 1)
             else:
                 if move.line <= block.y or move.line >= block.y + block.height:
                     raise ValueError(f"Cut coordinates are outside the block")
 
-                self.add_block(Block(f"{block.id}.0", block.x, block.y, block.width, move.line - block.y))
-                self.add_block(Block(f"{block.id}.1", block.x, move.line, block.width, block.height - (move.line - block.y)))
+                self.add_block(block.x, block.y, block.width, move.line - block.y, block.handle, 0)
+                self.add_block(block.x, move.line, block.width, block.height - (move.line - block.y), block.handle, 1)
 
-            self.remove_block(block.id)
+            self.remove_block(block.handle)
 
-            return round(7 * self.size / block.size)
+            cost = round(7 * self.size / block.size)
         elif isinstance(move, PointCutMove):
             block = self.get_block_by_id(move.block)
 
             if move.x <= block.x or move.x >= block.x + block.width or move.y <= block.y or move.y >= block.y + block.height:
                 raise ValueError(f"Cut coordinates are outside the block")
 
-            self.add_block(Block(f"{block.id}.0", block.x, block.y, move.x - block.x, move.y - block.y))
-            self.add_block(Block(f"{block.id}.1", move.x, block.y, block.width - (move.x - block.x), move.y - block.y))
-            self.add_block(Block(f"{block.id}.2", move.x, move.y, block.width - (move.x - block.x), block.height - (move.y - block.y)))
-            self.add_block(Block(f"{block.id}.3", block.x, move.y, move.x - block.x, block.height - (move.y - block.y)))
-            self.remove_block(block.id)
+            self.add_block(block.x, block.y, move.x - block.x, move.y - block.y, block.handle, 0)
+            self.add_block(move.x, block.y, block.width - (move.x - block.x), move.y - block.y, block.handle, 1)
+            self.add_block(move.x, move.y, block.width - (move.x - block.x), block.height - (move.y - block.y), block.handle, 2)
+            self.add_block(block.x, move.y, move.x - block.x, block.height - (move.y - block.y), block.handle, 3)
+            self.remove_block(block.handle)
 
-            return round(10 * self.size / block.size)
+            cost = round(10 * self.size / block.size)
         elif isinstance(move, ColorMove):
             block = self.get_block_by_id(move.block)
 
-            self.pixels[block.y:block.y + block.height, block.x:block.x + block.width, 0] = move.color.r
-            self.pixels[block.y:block.y + block.height, block.x:block.x + block.width, 1] = move.color.g
-            self.pixels[block.y:block.y + block.height, block.x:block.x + block.width, 2] = move.color.b
-            self.pixels[block.y:block.y + block.height, block.x:block.x + block.width, 3] = move.color.a
+            if len(self.checkpoints) > 0:
+                self.record_pixels(block.x, block.y, block.width, block.height)
 
-            return round(5 * self.size / block.size)
+            color = np.array([move.color.r, move.color.g, move.color.b, move.color.a], dtype=np.uint8)
+            if self.target_pixels is not None:
+                self.distance_sum += kernels.fill(self.pixels, self.target_pixels, self.distances,
+                                                  block.x, block.y, block.width, block.height, color)
+            else:
+                self.pixels[block.y:block.y + block.height, block.x:block.x + block.width] = color
+
+            cost = round(5 * self.size / block.size)
         elif isinstance(move, SwapMove):
             block1 = self.get_block_by_id(move.block1)
             block2 = self.get_block_by_id(move.block2)
@@ -144,58 +339,176 @@ class Canvas:
             if block1.width != block2.width or block1.height != block2.height:
                 raise ValueError(f"Blocks have different shapes")
 
-            self.pixels[block1.y:block1.y + block1.height, block1.x:block1.x + block1.width, :], \
-            self.pixels[block2.y:block2.y + block2.height, block2.x:block2.x + block2.width, :] = \
-            self.pixels[block2.y:block2.y + block2.height, block2.x:block2.x + block2.width, :], \
-            self.pixels[block1.y:block1.y + block1.height, block1.x:block1.x + block1.width, :].copy()
+            if len(self.checkpoints) > 0:
+                self.record_pixels(block1.x, block1.y, block1.width, block1.height, True)
+                self.record_pixels(block2.x, block2.y, block2.width, block2.height, True)
+                self.undo_log.append(("move", block1.handle, block1.x, block1.y))
+                self.undo_log.append(("move", block2.handle, block2.x, block2.y))
 
-            block1.x, block1.y = block2.x, block2.y
+            if self.target_pixels is not None:
+                self.distance_sum += kernels.swap(self.pixels, self.target_pixels, self.distances,
+                                                  block1.x, block1.y, block2.x, block2.y, block1.width, block1.height)
+            else:
+                self.pixels[block1.y:block1.y + block1.height, block1.x:block1.x + block1.width, :], \
+                self.pixels[block2.y:block2.y + block2.height, block2.x:block2.x + block2.width, :] = \
+                self.pixels[block2.y:block2.y + block2.height, block2.x:block2.x + block2.width, :], \
+                self.pixels[block1.y:block1.y + block1.height, block1.x:block1.x + block1.width, :].copy()
 
-            return round(3 * self.size / block1.size)
+            self.block_owners[block1.y:block1.y + block1.height, block1.x:block1.x + block1.width], \
+            self.block_owners[block2.y:block2.y + block2.height, block2.x:block2.x + block2.width] = \
+            self.block_owners[block2.y:block2.y + block2.height, block2.x:block2.x + block2.width], \
+            self.block_owners[block1.y:block1.y + block1.height, block1.x:block1.x + block1.width].copy()
+
+            self.blocks.move(block1.handle, block2.x, block2.y)
+            self.blocks.move(block2.handle, block1.x, block1.y)
+
+            cost = round(3 * self.size / block1.size)
         elif isinstance(move, MergeMove):
             block1 = self.get_block_by_id(move.block1)
             block2 = self.get_block_by_id(move.block2)
 
             if block1.x == block2.x and block1.width == block2.width and block1.y + block1.height == block2.y:
-                self.add_block(Block(f"{self.next_block_id}", block1.x, block1.y, block1.width, block1.height + block2.height))
+                self.add_block(block1.x, block1.y, block1.width, block1.height + block2.height, id=f"{self.next_block_id}")
             elif block1.x == block2.x and block1.width == block2.width and block2.y + block2.height == block1.y:
-                self.add_block(Block(f"{self.next_block_id}", block2.x, block2.y, block1.width, block1.height + block2.height))
+                self.add_block(block2.x, block2.y, block1.width, block1.height + block2.height, id=f"{self.next_block_id}")
             elif block1.y == block2.y and block1.height == block2.height and block1.x + block1.width == block2.x:
-                self.add_block(Block(f"{self.next_block_id}", block1.x, block1.y, block1.width + block2.width, block1.height))
+                self.add_block(block1.x, block1.y, block1.width + block2.width, block1.height, id=f"{self.next_block_id}")
             elif block1.y == block2.y and block1.height == block2.height and block2.x + block2.width == block1.x:
-                self.add_block(Block(f"{self.next_block_id}", block2.x, block2.y, block1.width + block2.width, block1.height))
+                self.add_block(block2.x, block2.y, block1.width + block2.width, block1.height, id=f"{self.next_block_id}")
             else:
                 raise ValueError(f"Blocks are not adjoint, or their adjoint sides do not have the same length")
 
-            self.remove_block(block1.id)
-            self.remove_block(block2.id)
+            self.remove_block(block1.handle)
+            self.remove_block(block2.handle)
             self.next_block_id += 1
 
-            return round(1 * self.size / max(block1.size, block2.size))
+            cost = round(1 * self.size / max(block1.size, block2.size))
         else:
             raise NotImplementedError()
 
+        self.cost += cost
+        return cost
+
+    def checkpoint(self: "Canvas") -> None:
+        distance_sum = self.distance_sum if self.target_pixels is not None else None
+        self.checkpoints.append((len(self.undo_log), self.cost, self.next_block_id, distance_sum))
+
+    def commit(self: "Canvas") -> None:
+        self.checkpoints.pop()
+        if len(self.checkpoints) == 0:
+            self.undo_log.clear()
+
+    def rollback(self: "Canvas") -> None:
+        undo_log_size, self.cost, self.next_block_id, distance_sum = self.checkpoints.pop()
+        if distance_sum is not None:
+            self.distance_sum = distance_sum
+
+        while len(self.undo_log) > undo_log_size:
+            entry = self.undo_log.pop()
+
+            if entry[0] == "pixels":
+                _, x, y, width, height, pixels, distances, owners = entry
+                self.pixels[y:y + height, x:x + width] = pixels
+                if distances is not None:
+                    self.distances[y:y + height, x:x + width] = distances
+                if owners is not None:
+                    self.block_owners[y:y + height, x:x + width] = owners
+            elif entry[0] == "add":
+                _, x, y, width, height, owners = entry
+                self.blocks.pop()
+                self.block_owners[y:y + height, x:x + width] = owners
+            elif entry[0] == "remove":
+                _, handle = entry
+                self.blocks.restore(handle)
+            elif entry[0] == "move":
+                _, handle, x, y = entry
+                self.blocks.move(handle, x, y)
+
+    def record_pixels(self: "Canvas", x: int, y: int, width: int, height: int, include_owners: bool = False) -> None:
+        pixels = self.pixels[y:y + height, x:x + width].copy()
+        distances = self.distances[y:y + height, x:x + width].copy() if self.target_pixels is not None else None
+        owners = self.block_owners[y:y + height, x:x + width].copy() if include_owners else None
+
+        self.undo_log.append(("pixels", x, y, width, height, pixels, distances, owners))
+
+    def update_distances(self: "Canvas", x: int, y: int, width: int, height: int) -> None:
+        if self.target_pixels is None:
+            return
+
+        self.distance_sum += kernels.update_distances(self.pixels, self.target_pixels, self.distances, x, y, width, height)
+
+    def get_similarity(self: "Canvas") -> int:
+        if self.target_pixels is None:
+            raise RuntimeError("Canvas is not bound to a target image")
+
+        return round(self.distance_sum * 0.005)
+
+    def get_score(self: "Canvas") -> int:
+        return self.cost + self.get_similarity()
+
+    def get_color_costs(self: "Canvas", block: Block, colors: List[Color]) -> np.ndarray:
+        if self.target_pixels is None:
+            raise RuntimeError("Canvas is not bound to a target image")
+
+        target_pixels = self.target_pixels[block.y:block.y + block.height, block.x:block.x + block.width]
+        current_distance = self.distances[block.y:block.y + block.height, block.x:block.x + block.width].sum()
+
+        costs = np.empty(len(colors) + 1, dtype=np.float64)
+        costs[0] = current_distance * 0.005
+
+        if len(colors) > 0:
+            color_distances = get_color_distances(target_pixels, np.array([[color.r, color.g, color.b, color.a] for color in colors]))
+            costs[1:] = round(5 * self.size / block.size) + color_distances * 0.005
+
+        return costs
+
     def get_block_by_id(self: "Canvas", id: str) -> Block:
-        if id not in self.blocks:
+        try:
+            return self.blocks.get_block(self.blocks.get_handle(id))
+        except KeyError:
             raise ValueError(f"Block {id} does not exist")
 
-        return self.blocks[id]
-
     def get_block_by_pixel(self: "Canvas", x: int, y: int) -> Block:
         if x < 0 or x >= self.width or y < 0 or y >= self.height:
             raise ValueError(f"Given coordinates are outside the canvas")
 
-        for block in self.blocks.values():
-            if block.x <= x < block.x + block.width and block.y <= y < block.y + block.height:
-                return block
+        owner = int(self.block_owners[y, x])
+        if not self.blocks.is_alive(owner):
+            raise RuntimeError("No block exists for the given coordinates, this is a bug")
+
+        return self.blocks.get_block(owner)
+
+    def get_blocks_by_area(self: "Canvas", x: int, y: int, width: int, height: int) -> List[Block]:
+        return [self.blocks.get_block(handle) for handle in self.blocks.get_overlapping(x, y, width, height)]
+
+    def get_mergeable_blocks(self: "Canvas", block: Block) -> List[Block]:
+        mergeable_blocks = []
+
+        for x, y in [(block.x - 1, block.y), (block.x + block.width, block.y), (block.x, block.y - 1), (block.x, block.y + block.height)]:
+            if x < 0 or x >= self.width or y < 0 or y >= self.height:
+                continue
 
-        raise RuntimeError("No block exists for the given coordinates, this is a bug")
+            neighbour = self.blocks.get_block(int(self.block_owners[y, x]))
+            if (neighbour.y == block.y and neighbour.height == block.height and neighbour.x in [block.x - neighbour.width, block.x + block.width]) \
+                    or (neighbour.x == block.x and neighbour.width == block.width and neighbour.y in [block.y - neighbour.height, block.y + block.height]):
+                mergeable_blocks.append(neighbour)
 
-    def add_block(self: "Canvas", block: Block) -> None:
-        self.blocks[block.id] = block
+        return mergeable_blocks
 
-    def remove_block(self: "Canvas", id: str) -> None:
-        self.blocks.pop(id)
+    def add_block(self: "Canvas", x: int, y: int, width: int, height: int, parent: int = -1, index: int = -1, id: Optional[str] = None) -> int:
+        if len(self.checkpoints) > 0:
+            self.undo_log.append(("add", x, y, width, height, self.block_owners[y:y + height, x:x + width].copy()))
+
+        handle = self.blocks.add(x, y, width, height, parent, index, id)
+        self.block_owners[y:y + height, x:x + width] = handle
+
+        return handle
+
+    def remove_block(self: "Canvas", handle: int) -> None:
+        self.blocks.remove(handle)
+
+        if len(self.checkpoints) > 0:
+            self.undo_log.append(("remove", handle))
 
     def save_to_image(self: "Canvas", destination: Path) -> None:
         Image.fromarray(np.flip(self.pixels, 0)).save(destination)
@@ -204,17 +517,106 @@ class MoveError(Exception):
     def __init__(self: "MoveError", move: Move, index: int, message: str) -> None:
         super().__init__(f"{message} (move {index + 1}: {move.to_isl()})")
 
-def get_score(target_image: Image, initial_config: Dict[str, Any], moves: List[Move]) -> int:
-    canvas = Canvas(initial_config)
+def simulate(target_image: Image, initial_config: Dict[str, Any], moves: Iterable[Move]) -> Canvas:
+    canvas = Canvas(initial_config, target_image)
 
-    total_cost = 0
     for i, move in enumerate(moves):
         try:
-            total_cost += canvas.apply_move(move)
+            canvas.apply_move(move)
         except Exception as e:
-            raise RuntimeError(f"Could not apply move {i + 1}: {move.to_isl()}") from e
+            raise MoveError(move, i, "Could not apply move") from e
+
+    return canvas
+
+def get_score(target_image: Image, initial_config: Dict[str, Any], moves: List[Move]) -> int:
+    return simulate(target_image, initial_config, moves).get_score()
+
+DEADLINE_CHUNK_SIZE = 16
+
+executors = {}
+worker_target_pixels = None
+
+def set_worker_target(target_pixels: np.ndarray) -> None:
+    global worker_target_pixels
+    worker_target_pixels = target_pixels
+
+def get_executor(jobs: int, target_pixels: np.ndarray) -> ProcessPoolExecutor:
+    if jobs in executors and executors[jobs][0] is not target_pixels:
+        executors.pop(jobs)[1].shutdown()
+
+    if jobs not in executors:
+        executors[jobs] = (target_pixels, ProcessPoolExecutor(max_workers=jobs, initializer=set_worker_target, initargs=(target_pixels,)))
+
+    return executors[jobs][1]
+
+def shutdown_executors() -> None:
+    while len(executors) > 0:
+        _, (_, executor) = executors.popitem()
+        executor.shutdown()
+
+atexit.register(shutdown_executors)
+
+def get_worker_canvas(canvas: Canvas) -> Canvas:
+    worker_canvas = Canvas.__new__(Canvas)
+    worker_canvas.__dict__.update(canvas.__dict__)
+
+    worker_canvas.target_pixels = None
+    worker_canvas.distances = None
+    worker_canvas.checkpoints = []
+    worker_canvas.undo_log = []
+
+    return worker_canvas
+
+def evaluate_candidate_chunk(canvas: Canvas, candidates: List[List[Move]]) -> List[int]:
+    scores = []
+
+    for moves in candidates:
+        canvas.checkpoint()
+
+        for move in moves:
+            canvas.apply_move(move)
+
+        scores.append(canvas.get_score())
+        canvas.rollback()
+
+    return scores
+
+def evaluate_worker_candidate_chunk(canvas: Canvas, candidates: List[List[Move]]) -> List[int]:
+    canvas.target_pixels = worker_target_pixels
+    canvas.distances = get_distances(canvas.pixels, worker_target_pixels)
+
+    return evaluate_candidate_chunk(canvas, candidates)
+
+def evaluate_candidates(canvas: Canvas,
+                        candidates: List[List[Move]],
+                        jobs: Optional[int] = None,
+                        deadline: Optional[float] = None) -> Tuple[List[int], int]:
+    if deadline is not None:
+        scores = []
+        for start in range(0, len(candidates), DEADLINE_CHUNK_SIZE):
+            if len(scores) > 0 and time.perf_counter() >= deadline:
+                break
+
+            scores.extend(evaluate_candidates(canvas, candidates[start:start + DEADLINE_CHUNK_SIZE], jobs)[0])
+
+        best = int(np.argmin(scores)) if len(scores) > 0 else -1
+        return scores, best
+
+    if jobs is None:
+        jobs = int(os.environ.get("ICFPC_2022_CANDIDATE_JOBS", "1"))
+
+    if jobs > 1 and len(candidates) > 1:
+        executor = get_executor(jobs, canvas.target_pixels)
+        worker_canvas = get_worker_canvas(canvas)
+
+        chunk_count = min(jobs, len(candidates))
 
-    target_pixels = np.flip(np.array(target_image), 0)
-    similarity = round(np.sqrt(((canvas.pixels.astype(np.int32) - target_pixels.astype(np.int32)) ** 2).sum(axis=2)).sum() * 0.005)
+        scores = [0] * len(candidates)
+        chunks = [candidates[i::chunk_count] for i in range(chunk_count)]
+        for i, chunk_scores in enumerate(executor.map(evaluate_worker_candidate_chunk, [worker_canvas] * chunk_count, chunks)):
+            scores[i::chunk_count] = chunk_scores
+    else:
+        scores = evaluate_candidate_chunk(canvas, candidates)
 
-    return total_cost + similarity
+    best = int(np.argmin(scores)) if len(scores) > 0 else -1
+    return scores, best
@@ -0,0 +1,120 @@
+import argparse
+import importlib
+import json
+import socketserver
+import sys
+import time
+from pathlib import Path
+from PIL import Image
+from types import ModuleType
+from typing import Any, Callable, Dict, Tuple
+
+def get_socket_file() -> Path:
+    return Path(__file__).parent.parent / "results" / "daemon.sock"
+
+def get_source_signature() -> Tuple[Tuple[str, int], ...]:
+    return tuple(sorted((str(file), file.stat().st_mtime_ns) for file in Path(__file__).parent.rglob("*.py")))
+
+class SolverState:
+    def __init__(self: "SolverState") -> None:
+        self.source_signature = None
+        self.run = None
+        self.targets = {}
+
+    def load_modules(self: "SolverState") -> ModuleType:
+        source_signature = get_source_signature()
+        if source_signature == self.source_signature:
+            return self.run
+
+        if "core" in sys.modules:
+            sys.modules["core"].shutdown_executors()
+
+        source_directory = Path(__file__).parent.resolve()
+        for name, module in list(sys.modules.items()):
+            module_file = getattr(module, "__file__", None)
+            if name != "__main__" and module_file is not None and source_directory in Path(module_file).resolve().parents:
+                del sys.modules[name]
+
+        start_time = time.perf_counter()
+
+        self.run = importlib.import_module("run")
+        for painter_file in sorted((source_directory / "painters").glob("*.py")):
+            importlib.import_module(f"painters.{painter_file.stem}")
+
+        self.source_signature = source_signature
+        print(f"Loaded modules in {time.perf_counter() - start_time:.2f}s")
+
+        return self.run
+
+    def get_target(self: "SolverState", image_file: Path, image_hash: str) -> Tuple[Image.Image, Dict[str, Any]]:
+        if image_file.stem not in self.targets or self.targets[image_file.stem][0] != image_hash:
+            image, initial_config = self.run.load_target(image_file)
+            image.load()
+
+            self.targets[image_file.stem] = (image_hash, image, initial_config)
+
+        _, image, initial_config = self.targets[image_file.stem]
+        return image, initial_config
+
+    def solve(self: "SolverState", request: Dict[str, Any], send: Callable[[Dict[str, Any]], None]) -> None:
+        run = self.load_modules()
+
+        image_files = run.get_image_files(request.get("image"))
+
+        total_score = 0
+        try:
+            for image_file, result in run.run_painter(request["painter"],
+                                                      image_files,
+                                                      force=request.get("force", False),
+                                                      polish_seconds=request.get("polish", 0),
+                                                      time_budget=request.get("time_budget"),
+                                                      get_target=self.get_target):
+                total_score += result["score"]
+                send({"image": image_file.stem, "score": result["score"], "cached": result["cached"], "runtime": result.get("runtime")})
+        finally:
+            sys.modules["core"].shutdown_executors()
+
+        run.update_overview()
+        send({"total_score": total_score, "images": len(image_files)})
+
+class SolverHandler(socketserver.StreamRequestHandler):
+    state: SolverState = None
+
+    def send(self: "SolverHandler", message: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def handle(self: "SolverHandler") -> None:
+        request = json.loads(self.rfile.readline())
+        print(f"Request: {request}")
+
+        try:
+            self.state.solve(request, self.send)
+        except Exception as e:
+            self.send({"error": f"{type(e).__name__}: {e}"})
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a solver daemon that keeps painters imported and targets decoded between runs.")
+    parser.add_argument("--socket", type=str, default=str(get_socket_file()), help="the Unix socket to listen on (defaults to results/daemon.sock)")
+
+    args = parser.parse_args()
+
+    socket_file = Path(args.socket)
+    socket_file.unlink(missing_ok=True)
+
+    SolverHandler.state = SolverState()
+    SolverHandler.state.load_modules()
+
+    server = socketserver.UnixStreamServer(str(socket_file), SolverHandler)
+    print(f"Listening on {socket_file}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_file.unlink(missing_ok=True)
+
+if __name__ == "__main__":
+    main()
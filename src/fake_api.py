@@ -0,0 +1,134 @@
+import argparse
+import json
+import random
+import re
+import threading
+from core import MoveError, get_score, parse_isl
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from PIL import Image
+from typing import Any, Dict, Optional
+
+class FakeApiState:
+    def __init__(self: "FakeApiState", failure_rate: float, failure_status: int = 503) -> None:
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.request_count = 0
+        self.lock = threading.Lock()
+        self.results = {}
+        self.next_submission_id = 1
+
+    def create_submission(self: "FakeApiState", problem_id: int, content: str) -> int:
+        input_directory = Path(__file__).parent.parent / "results" / "input"
+
+        image = Image.open(input_directory / f"{problem_id}.png")
+        initial_config = json.loads((input_directory / f"{problem_id}.json").read_text(encoding="utf-8"))
+
+        score = get_score(image, initial_config, [move for _, move in parse_isl(content)])
+
+        with self.lock:
+            submission_id = self.next_submission_id
+            self.next_submission_id += 1
+
+            result = self.results.setdefault(problem_id, {"problem_id": problem_id, "min_cost": 0, "submission_count": 0})
+            result["submission_count"] += 1
+            if result["min_cost"] == 0 or score < result["min_cost"]:
+                result["min_cost"] = score
+
+        return submission_id
+
+    def get_results(self: "FakeApiState") -> Dict[str, Any]:
+        with self.lock:
+            results = [dict(result) for _, result in sorted(self.results.items())]
+
+        return {"results": results, "total_cost": sum(result["min_cost"] for result in results)}
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    state: FakeApiState = None
+
+    def send_json(self: "FakeApiHandler", status: int, body: Dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def check_request(self: "FakeApiHandler") -> bool:
+        with self.state.lock:
+            self.state.request_count += 1
+
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self.send_json(401, {"error": "Missing API key"})
+            return False
+
+        if random.random() < self.state.failure_rate:
+            self.send_json(self.state.failure_status, {"error": "Injected failure"})
+            return False
+
+        return True
+
+    def read_file(self: "FakeApiHandler") -> Optional[str]:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + body)
+
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                return part.get_payload(decode=True).decode("utf-8")
+
+        return None
+
+    def do_GET(self: "FakeApiHandler") -> None:
+        if self.path != "/api/results/user":
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        if self.check_request():
+            self.send_json(200, self.state.get_results())
+
+    def do_POST(self: "FakeApiHandler") -> None:
+        match = re.fullmatch(r"/api/submissions/(\d+)/create", self.path)
+        if match is None:
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        content = self.read_file()
+
+        if not self.check_request():
+            return
+
+        if content is None:
+            self.send_json(400, {"error": "Missing file"})
+            return
+
+        try:
+            submission_id = self.state.create_submission(int(match[1]), content)
+        except (FileNotFoundError, MoveError, ValueError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        self.send_json(200, {"submission_id": submission_id})
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the contest API.")
+    parser.add_argument("--port", type=int, default=8022, help="the port to listen on (defaults to 8022)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="the fraction of requests to fail before they are processed (defaults to 0)")
+    parser.add_argument("--failure-status", type=int, default=503, help="the status code of failed requests (defaults to 503)")
+
+    args = parser.parse_args()
+
+    FakeApiHandler.state = FakeApiState(args.failure_rate, args.failure_status)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FakeApiHandler)
+    print(f"Listening on http://127.0.0.1:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import shutil
+import sqlite3
+from core import parse_isl, simulate
+from pathlib import Path
+from PIL import Image
+from typing import Dict, List, Optional
+
+BEST_PAINTER = "best"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    painter TEXT NOT NULL,
+    image TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    cost INTEGER,
+    similarity INTEGER,
+    moves INTEGER,
+    runtime REAL,
+    painter_hash TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS runs_by_painter_image ON runs (painter, image, id);
+CREATE INDEX IF NOT EXISTS runs_by_image_score ON runs (image, score);
+"""
+
+def create_connection(database: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(database)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+
+    return connection
+
+def connect() -> sqlite3.Connection:
+    connection = create_connection(str(Path(__file__).parent.parent / "results" / "history.db"))
+
+    if connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 0:
+        backfill(connection)
+
+    return connection
+
+def insert_run(connection: sqlite3.Connection,
+               painter: str,
+               image: str,
+               score: int,
+               cost: Optional[int] = None,
+               similarity: Optional[int] = None,
+               moves: Optional[int] = None,
+               runtime: Optional[float] = None,
+               painter_hash: Optional[str] = None) -> None:
+    connection.execute("INSERT INTO runs (painter, image, score, cost, similarity, moves, runtime, painter_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                       (painter, image, score, cost, similarity, moves, runtime, painter_hash))
+
+def record_run(connection: sqlite3.Connection,
+               painter: str,
+               image: str,
+               score: int,
+               cost: Optional[int] = None,
+               similarity: Optional[int] = None,
+               moves: Optional[int] = None,
+               runtime: Optional[float] = None,
+               painter_hash: Optional[str] = None) -> None:
+    with connection:
+        insert_run(connection, painter, image, score, cost, similarity, moves, runtime, painter_hash)
+
+def get_latest_scores(connection: sqlite3.Connection) -> Dict[str, Dict[str, int]]:
+    scores_by_painter = {}
+
+    for row in connection.execute("SELECT painter, image, score FROM runs WHERE id IN (SELECT MAX(id) FROM runs GROUP BY painter, image)"):
+        scores_by_painter.setdefault(row["painter"], {})[row["image"]] = row["score"]
+
+    return scores_by_painter
+
+def get_best_runs(connection: sqlite3.Connection) -> List[sqlite3.Row]:
+    return connection.execute("""
+        WITH latest AS (
+            SELECT * FROM runs WHERE id IN (SELECT MAX(id) FROM runs GROUP BY painter, image)
+        ), ranked AS (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY image ORDER BY score, id) AS rank FROM latest
+        )
+        SELECT * FROM ranked WHERE rank = 1 ORDER BY CAST(image AS INTEGER)
+    """).fetchall()
+
+def get_image_history(connection: sqlite3.Connection, painter: str, image: str) -> List[sqlite3.Row]:
+    return connection.execute("SELECT * FROM runs WHERE painter = ? AND image = ? ORDER BY id", (painter, image)).fetchall()
+
+def backfill(connection: sqlite3.Connection, simulate_programs: bool = False) -> int:
+    input_directory = Path(__file__).parent.parent / "results" / "input"
+    outputs_root = Path(__file__).parent.parent / "results" / "output"
+
+    if not outputs_root.is_dir():
+        return 0
+
+    known_runs_query = "SELECT DISTINCT painter, image FROM runs" + (" WHERE cost IS NOT NULL" if simulate_programs else "")
+    known_runs = {(row["painter"], row["image"]) for row in connection.execute(known_runs_query)}
+
+    count = 0
+    with connection:
+        for directory in sorted(outputs_root.iterdir()):
+            if not directory.is_dir() or directory.name == BEST_PAINTER:
+                continue
+
+            for score_file in sorted(directory.glob("*.txt"), key=lambda file: int(file.stem)):
+                if (directory.name, score_file.stem) in known_runs:
+                    continue
+
+                score = int(score_file.read_text(encoding="utf-8"))
+                cost, similarity, moves = None, None, None
+
+                isl_file = directory / f"{score_file.stem}.isl"
+                if simulate_programs and isl_file.is_file():
+                    image = Image.open(input_directory / f"{score_file.stem}.png")
+                    initial_config = json.loads((input_directory / f"{score_file.stem}.json").read_text(encoding="utf-8"))
+
+                    program = [move for _, move in parse_isl(isl_file.read_text(encoding="utf-8"))]
+                    canvas = simulate(image, initial_config, program)
+
+                    cost, similarity, moves = canvas.cost, canvas.get_similarity(), len(program)
+
+                insert_run(connection, directory.name, score_file.stem, score, cost, similarity, moves)
+                count += 1
+
+    return count
+
+def export_best(connection: sqlite3.Connection) -> List[sqlite3.Row]:
+    outputs_root = Path(__file__).parent.parent / "results" / "output"
+
+    best_directory = outputs_root / BEST_PAINTER
+    best_directory.mkdir(parents=True, exist_ok=True)
+
+    best_runs = get_best_runs(connection)
+    for run in best_runs:
+        for extension in ["isl", "png", "txt"]:
+            shutil.copyfile(outputs_root / run["painter"] / f"{run['image']}.{extension}", best_directory / f"{run['image']}.{extension}")
+
+    with (best_directory / "painters.json").open("w+", encoding="utf-8") as file:
+        file.write(json.dumps({run["image"]: run["painter"] for run in best_runs}, indent=4))
+
+    return best_runs
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the history of painter results.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="record the stored results that are not in the history yet")
+    backfill_parser.add_argument("--simulate", action="store_true", help="simulate the stored programs to also record their cost, similarity and move count")
+    subparsers.add_parser("best", help="export the best result per image to results/output/best")
+
+    show_parser = subparsers.add_parser("show", help="show all runs of a painter on an image")
+    show_parser.add_argument("painter", type=str, help="the painter to show the runs of")
+    show_parser.add_argument("image", type=int, help="the image to show the runs of")
+
+    args = parser.parse_args()
+
+    connection = connect()
+
+    if args.command == "backfill":
+        print(f"Recorded {backfill(connection, args.simulate):,.0f} results")
+    elif args.command == "best":
+        best_runs = export_best(connection)
+        for run in best_runs:
+            print(f"{run['image']}: {run['score']:,.0f} ({run['painter']})")
+
+        print(f"Total score: {sum(run['score'] for run in best_runs):,.0f}")
+    elif args.command == "show":
+        for run in get_image_history(connection, args.painter, str(args.image)):
+            details = [f"{run['score']:,.0f}"]
+
+            if run["cost"] is not None:
+                details.append(f"cost {run['cost']:,.0f}, similarity {run['similarity']:,.0f}, {run['moves']:,.0f} moves")
+
+            if run["runtime"] is not None:
+                details.append(f"{run['runtime']:.2f}s, painter {run['painter_hash'][:8]}")
+
+            print(f"{run['created_at']}: {', '.join(details)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import numpy as np
+import os
+import warnings
+from typing import Optional
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+def update_distances_numpy(pixels: np.ndarray, target_pixels: np.ndarray, distances: np.ndarray,
+                           x: int, y: int, width: int, height: int) -> float:
+    new_distances = np.sqrt(((pixels[y:y + height, x:x + width].astype(np.int32)
+                              - target_pixels[y:y + height, x:x + width].astype(np.int32)) ** 2).sum(axis=2))
+
+    delta = new_distances.sum() - distances[y:y + height, x:x + width].sum()
+    distances[y:y + height, x:x + width] = new_distances
+
+    return delta
+
+def fill_numpy(pixels: np.ndarray, target_pixels: np.ndarray, distances: np.ndarray,
+               x: int, y: int, width: int, height: int, color: np.ndarray) -> float:
+    pixels[y:y + height, x:x + width] = color
+    return update_distances_numpy(pixels, target_pixels, distances, x, y, width, height)
+
+def swap_numpy(pixels: np.ndarray, target_pixels: np.ndarray, distances: np.ndarray,
+               x1: int, y1: int, x2: int, y2: int, width: int, height: int) -> float:
+    pixels[y1:y1 + height, x1:x1 + width], pixels[y2:y2 + height, x2:x2 + width] = \
+        pixels[y2:y2 + height, x2:x2 + width], pixels[y1:y1 + height, x1:x1 + width].copy()
+
+    return update_distances_numpy(pixels, target_pixels, distances, x1, y1, width, height) \
+        + update_distances_numpy(pixels, target_pixels, distances, x2, y2, width, height)
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def get_distance_numba(pixels: np.ndarray, target_pixels: np.ndarray, x: int, y: int) -> float:
+        total = 0
+        for channel in range(4):
+            difference = np.int32(pixels[y, x, channel]) - np.int32(target_pixels[y, x, channel])
+            total += difference * difference
+
+        return np.sqrt(np.float64(total))
+
+    @numba.njit(cache=True)
+    def update_distances_numba(pixels: np.ndarray, target_pixels: np.ndarray, distances: np.ndarray,
+                               x: int, y: int, width: int, height: int) -> float:
+        delta = 0.0
+        for pixel_y in range(y, y + height):
+            for pixel_x in range(x, x + width):
+                distance = get_distance_numba(pixels, target_pixels, pixel_x, pixel_y)
+                delta += distance - distances[pixel_y, pixel_x]
+                distances[pixel_y, pixel_x] = distance
+
+        return delta
+
+    @numba.njit(cache=True)
+    def fill_numba(pixels: np.ndarray, target_pixels: np.ndarray, distances: np.ndarray,
+                   x: int, y: int, width: int, height: int, color: np.ndarray) -> float:
+        delta = 0.0
+        for pixel_y in range(y, y + height):
+            for pixel_x in range(x, x + width):
+                for channel in range(4):
+                    pixels[pixel_y, pixel_x, channel] = color[channel]
+
+                distance = get_distance_numba(pixels, target_pixels, pixel_x, pixel_y)
+                delta += distance - distances[pixel_y, pixel_x]
+                distances[pixel_y, pixel_x] = distance
+
+        return delta
+
+    @numba.njit(cache=True)
+    def swap_numba(pixels: np.ndarray, target_pixels: np.ndarray, distances: np.ndarray,
+                   x1: int, y1: int, x2: int, y2: int, width: int, height: int) -> float:
+        delta = 0.0
+        for offset_y in range(height):
+            for offset_x in range(width):
+                for channel in range(4):
+                    value = pixels[y1 + offset_y, x1 + offset_x, channel]
+                    pixels[y1 + offset_y, x1 + offset_x, channel] = pixels[y2 + offset_y, x2 + offset_x, channel]
+                    pixels[y2 + offset_y, x2 + offset_x, channel] = value
+
+                distance = get_distance_numba(pixels, target_pixels, x1 + offset_x, y1 + offset_y)
+                delta += distance - distances[y1 + offset_y, x1 + offset_x]
+                distances[y1 + offset_y, x1 + offset_x] = distance
+
+                distance = get_distance_numba(pixels, target_pixels, x2 + offset_x, y2 + offset_y)
+                delta += distance - distances[y2 + offset_y, x2 + offset_x]
+                distances[y2 + offset_y, x2 + offset_x] = distance
+
+        return delta
+
+BACKENDS = ["numba", "numpy"]
+
+def get_backend(requested_backend: Optional[str]) -> str:
+    if requested_backend is None or requested_backend == "":
+        return "numba" if numba is not None else "numpy"
+
+    if requested_backend not in BACKENDS:
+        raise RuntimeError(f"Unsupported kernel backend: {requested_backend} (expected one of {', '.join(BACKENDS)})")
+
+    if requested_backend == "numba" and numba is None:
+        warnings.warn("Numba is not installed, falling back to the numpy kernels")
+        return "numpy"
+
+    return requested_backend
+
+BACKEND = get_backend(os.environ.get("ICFPC_2022_KERNELS"))
+
+if BACKEND == "numba":
+    update_distances, fill, swap = update_distances_numba, fill_numba, swap_numba
+else:
+    update_distances, fill, swap = update_distances_numpy, fill_numpy, swap_numpy
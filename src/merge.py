@@ -0,0 +1,75 @@
+from core import Canvas, MergeMove, Move
+from typing import List, Optional, Tuple
+
+def get_grid(canvas: Canvas, x: int, y: int, width: int, height: int) -> Optional[Tuple[List[int], List[int]]]:
+    blocks = canvas.get_blocks_by_area(x, y, width, height)
+
+    xs = sorted({block.x for block in blocks} | {x + width})
+    ys = sorted({block.y for block in blocks} | {y + height})
+    if xs[0] != x or ys[0] != y:
+        return None
+
+    for cell_y, cell_height in zip(ys, [b - a for a, b in zip(ys, ys[1:])]):
+        for cell_x, cell_width in zip(xs, [b - a for a, b in zip(xs, xs[1:])]):
+            block = canvas.get_block_by_pixel(cell_x, cell_y)
+            if (block.x, block.y, block.width, block.height) != (cell_x, cell_y, cell_width, cell_height):
+                return None
+
+    return xs, ys
+
+class MergePlanner:
+    def __init__(self: "MergePlanner", canvas_size: int) -> None:
+        self.canvas_size = canvas_size
+        self.plans = {}
+
+    def get_cost(self: "MergePlanner", columns: Tuple[int, ...], rows: Tuple[int, ...]) -> int:
+        key = (columns, rows)
+        if key in self.plans:
+            return self.plans[key][0]
+
+        best_plan = (0, None)
+        if len(columns) > 1 or len(rows) > 1:
+            best_plan = (None, None)
+
+            width, height = sum(columns), sum(rows)
+            for split in range(1, len(columns)):
+                size = max(sum(columns[:split]), sum(columns[split:])) * height
+                cost = round(self.canvas_size / size) + self.get_cost(columns[:split], rows) + self.get_cost(columns[split:], rows)
+                if best_plan[0] is None or cost < best_plan[0]:
+                    best_plan = (cost, (split, 0))
+
+            for split in range(1, len(rows)):
+                size = width * max(sum(rows[:split]), sum(rows[split:]))
+                cost = round(self.canvas_size / size) + self.get_cost(columns, rows[:split]) + self.get_cost(columns, rows[split:])
+                if best_plan[0] is None or cost < best_plan[0]:
+                    best_plan = (cost, (0, split))
+
+        self.plans[key] = best_plan
+        return best_plan[0]
+
+    def merge(self: "MergePlanner", canvas: Canvas, xs: List[int], ys: List[int]) -> Tuple[List[Move], str]:
+        columns = tuple(b - a for a, b in zip(xs, xs[1:]))
+        rows = tuple(b - a for a, b in zip(ys, ys[1:]))
+
+        self.get_cost(columns, rows)
+        _, split = self.plans[(columns, rows)]
+
+        if split is None:
+            return [], canvas.get_block_by_pixel(xs[0], ys[0]).id
+
+        split_x, split_y = split
+        if split_x > 0:
+            moves1, block_id1 = self.merge(canvas, xs[:split_x + 1], ys)
+            moves2, block_id2 = self.merge(canvas, xs[split_x:], ys)
+        else:
+            moves1, block_id1 = self.merge(canvas, xs, ys[:split_y + 1])
+            moves2, block_id2 = self.merge(canvas, xs, ys[split_y:])
+
+        block2 = canvas.get_block_by_id(block_id2)
+        if block2 not in canvas.get_mergeable_blocks(canvas.get_block_by_id(block_id1)):
+            raise RuntimeError(f"Blocks {block_id1} and {block_id2} are not mergeable, this is a bug")
+
+        moves = moves1 + moves2 + [MergeMove(block_id1, block_id2)]
+        canvas.apply_move(moves[-1])
+
+        return moves, str(canvas.next_block_id - 1)
@@ -0,0 +1,89 @@
+import numpy as np
+from core import Canvas, ColorMove, Move, SwapMove, evaluate_candidates, get_color_distances
+from merge import MergePlanner, get_grid
+from painters.v6 import run as v6
+from painters.v8 import paint
+from painters.v9 import run as v9
+from PIL import Image
+from scipy.optimize import linear_sum_assignment
+from stats import ImageStats
+from targets import get_packed_pixels, get_target_pixels
+from typing import Any, Dict, List
+
+def swap_tiles(image_stats: ImageStats, canvas: Canvas, xs: List[int], ys: List[int]) -> List[Move]:
+    cells = [(x, y) for y in ys[:-1] for x in xs[:-1]]
+
+    widths = {b - a for a, b in zip(xs, xs[1:])}
+    heights = {b - a for a, b in zip(ys, ys[1:])}
+    if len(widths) != 1 or len(heights) != 1:
+        return []
+
+    width, height = widths.pop(), heights.pop()
+
+    colors = np.array([canvas.pixels[y, x] for x, y in cells])
+    distances = np.array([get_color_distances(canvas.target_pixels[y:y + height, x:x + width], colors) for x, y in cells]).T
+
+    recolor_costs = np.array([round(5 * canvas.size / (width * height)) + 0.005 * image_stats.get_optimal_distance(x, y, width, height)
+                              for x, y in cells])
+    fill_costs = np.minimum(distances * 0.005, recolor_costs)
+
+    swap_cost = round(3 * canvas.size / (width * height))
+    costs = fill_costs + swap_cost * (1 - np.eye(len(cells)))
+    tiles, targets = linear_sum_assignment(costs)
+
+    moves = []
+
+    visited = set()
+    for tile, target in zip(tiles, targets):
+        if tile in visited or tile == target:
+            continue
+
+        cycle = [tile]
+        while targets[cycle[-1]] != tile:
+            cycle.append(targets[cycle[-1]])
+        visited.update(cycle)
+
+        if costs[cycle, targets[cycle]].sum() - swap_cost >= costs[cycle, cycle].sum():
+            continue
+
+        x, y = cells[tile]
+        for other_tile in cycle[1:]:
+            other_x, other_y = cells[other_tile]
+            moves.append(SwapMove(canvas.get_block_by_pixel(x, y).id, canvas.get_block_by_pixel(other_x, other_y).id))
+            canvas.apply_move(moves[-1])
+
+    return moves
+
+def recolor_tiles(image_stats: ImageStats, canvas: Canvas) -> List[Move]:
+    moves = []
+
+    for block in list(canvas.blocks.values()):
+        color = image_stats.get_optimal_color(block.x, block.y, block.width, block.height)
+        if np.argmin(canvas.get_color_costs(block, [color])) == 1:
+            moves.append(ColorMove(block.id, color))
+            canvas.apply_move(moves[-1])
+
+    return moves
+
+def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
+    canvas = Canvas(initial_config, target_image)
+
+    grid = get_grid(canvas, 0, 0, canvas.width, canvas.height)
+    if grid is None:
+        return v6(target_image, initial_config)
+
+    image_stats = ImageStats(get_target_pixels(target_image), get_packed_pixels(target_image))
+
+    swap_moves = swap_tiles(image_stats, canvas, *grid)
+
+    canvas.checkpoint()
+    recolor_moves = recolor_tiles(image_stats, canvas)
+    canvas.rollback()
+
+    merge_moves, block_id = MergePlanner(canvas.size).merge(canvas, *grid)
+    paint_moves = paint(image_stats, canvas, canvas.get_block_by_id(block_id))
+
+    candidates = [swap_moves + recolor_moves, swap_moves + merge_moves + paint_moves, v9(target_image, initial_config)]
+
+    _, best = evaluate_candidates(Canvas(initial_config, target_image), candidates)
+    return candidates[best]
@@ -1,11 +1,12 @@
 import numpy as np
-from core import Canvas, Color, ColorMove, LineCutMove, Orientation, get_score, Move
+from core import Canvas, ColorMove, LineCutMove, Orientation, evaluate_candidates, Move
 from PIL import Image
+from stats import ImageStats
+from targets import get_packed_pixels, get_target_pixels
 from typing import Any, Dict, List
 
-def pixelate(target_image: Image, initial_config: Dict[str, any], block_size: int) -> List[Move]:
+def pixelate(target_image: Image, initial_config: Dict[str, any], image_stats: ImageStats, block_size: int) -> List[Move]:
     image_width, image_height = target_image.size
-    target_pixels = np.flip(np.array(target_image), 1)
 
     moves = []
     canvas = Canvas(initial_config)
@@ -27,11 +28,7 @@ def pixelate(target_image: Image, initial_config: Dict[str, any], block_size: in
                 canvas.apply_move(moves[-1])
                 block = canvas.get_block_by_pixel(x, y)
 
-            mean_r = target_pixels[x:x + block_width, y:y + block_height, 0].mean()
-            mean_g = target_pixels[x:x + block_width, y:y + block_height, 1].mean()
-            mean_b = target_pixels[x:x + block_width, y:y + block_height, 2].mean()
-            mean_a = target_pixels[x:x + block_width, y:y + block_height, 3].mean()
-            color = Color(round(mean_r), round(mean_g), round(mean_b), round(mean_a))
+            color = image_stats.get_mean_color(x, y, block_width, block_height)
 
             moves.append(ColorMove(block.id, color))
 
@@ -39,30 +36,22 @@ def pixelate(target_image: Image, initial_config: Dict[str, any], block_size: in
 
 def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
     canvas = Canvas(initial_config)
+    image_stats = ImageStats(get_target_pixels(target_image), get_packed_pixels(target_image))
+
     if "0" not in canvas.blocks or canvas.blocks["0"].size != canvas.size:
         moves = []
-        target_pixels = np.flip(np.array(target_image), 0)
 
         for block in canvas.blocks.values():
-            mean_r = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 0].mean()
-            mean_g = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 1].mean()
-            mean_b = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 2].mean()
-            mean_a = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 3].mean()
-
-            color = Color(round(mean_r), round(mean_g), round(mean_b), round(mean_a))
+            color = image_stats.get_mean_color(block.x, block.y, block.width, block.height)
             moves.append(ColorMove(block.id, color))
 
         return moves
 
-    best_moves = []
-    best_score = get_score(target_image, initial_config, best_moves)
+    candidates = [[]]
 
     width, height = target_image.size
     for block_size in np.arange(5, min(width, height) + 1, 5):
-        moves = pixelate(target_image, initial_config, block_size)
-        score = get_score(target_image, initial_config, moves)
-        if score < best_score:
-            best_moves = moves
-            best_score = score
+        candidates.append(pixelate(target_image, initial_config, image_stats, block_size))
 
-    return best_moves
+    _, best = evaluate_candidates(Canvas(initial_config, target_image), candidates)
+    return candidates[best]
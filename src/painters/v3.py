@@ -1,15 +1,16 @@
 import numpy as np
 from collections import defaultdict
-from core import Canvas, Color, ColorMove, LineCutMove, Orientation, PointCutMove, get_score, Move
+from core import Canvas, ColorMove, LineCutMove, Orientation, PointCutMove, evaluate_candidates, Move
 from PIL import Image
+from stats import ImageStats
+from targets import get_packed_pixels, get_target_pixels
 from typing import Any, Dict, List
 
-def pixelate(target_image: Image, initial_config: Dict[str, Any], max_block_size: int) -> List[Move]:
+def pixelate(target_image: Image, initial_config: Dict[str, Any], image_stats: ImageStats, max_block_size: int) -> List[Move]:
     image_width, image_height = target_image.size
-    target_pixels = np.flip(np.array(target_image), 0)
 
     moves = []
-    canvas = Canvas(initial_config)
+    canvas = Canvas(initial_config, target_image)
 
     color_counts = defaultdict(int)
     for y in range(0, image_height, max_block_size):
@@ -17,12 +18,7 @@ def pixelate(target_image: Image, initial_config: Dict[str, Any], max_block_size
             block_width = min(image_width - x, max_block_size)
             block_height = min(image_height - y, max_block_size)
 
-            common_r = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 0].flatten()))
-            common_g = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 1].flatten()))
-            common_b = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 2].flatten()))
-            common_a = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 3].flatten()))
-
-            color = Color(common_r, common_g, common_b, common_a)
+            color = image_stats.get_mode_color(x, y, block_width, block_height)
             color_counts[color] += 1
 
     most_used_color = max(color_counts.keys(), key=lambda color: color_counts[color])
@@ -48,43 +44,30 @@ def pixelate(target_image: Image, initial_config: Dict[str, Any], max_block_size
 
             block = canvas.get_block_by_pixel(x, y)
 
-            common_r = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 0].flatten()))
-            common_g = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 1].flatten()))
-            common_b = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 2].flatten()))
-            common_a = np.argmax(np.bincount(target_pixels[y:y + block_height, x:x + block_width, 3].flatten()))
-
-            color = Color(common_r, common_g, common_b, common_a)
-            if color != most_used_color:
+            color = image_stats.get_mode_color(x, y, block_width, block_height)
+            if color != most_used_color and np.argmin(canvas.get_color_costs(block, [color])) == 1:
                 moves.append(ColorMove(block.id, color))
 
     return moves
 
 def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
+    image_stats = ImageStats(get_target_pixels(target_image), get_packed_pixels(target_image))
+
     canvas = Canvas(initial_config)
     if "0" not in canvas.blocks or canvas.blocks["0"].size != canvas.size:
         moves = []
-        target_pixels = np.flip(np.array(target_image), 0)
 
         for block in canvas.blocks.values():
-            mean_r = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 0].mean()
-            mean_g = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 1].mean()
-            mean_b = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 2].mean()
-            mean_a = target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 3].mean()
-
-            color = Color(round(mean_r), round(mean_g), round(mean_b), round(mean_a))
+            color = image_stats.get_mean_color(block.x, block.y, block.width, block.height)
             moves.append(ColorMove(block.id, color))
 
         return moves
 
-    best_moves = []
-    best_score = get_score(target_image, initial_config, best_moves)
+    candidates = [[]]
 
     width, height = target_image.size
     for block_size in range(10, min(width, height) + 1, 10):
-        moves = pixelate(target_image, block_size)
-        score = get_score(target_image, initial_config, moves)
-        if score < best_score:
-            best_moves = moves
-            best_score = score
+        candidates.append(pixelate(target_image, initial_config, image_stats, block_size))
 
-    return best_moves
+    _, best = evaluate_candidates(Canvas(initial_config, target_image), candidates)
+    return candidates[best]
@@ -1,56 +1,72 @@
-import numpy as np
-from copy import deepcopy
-from core import Canvas, Color, ColorMove, PointCutMove, get_score, Move
+import time
+from core import Canvas, ColorMove, PointCutMove, Move
 from PIL import Image
-from typing import Any, Dict, List
+from stats import ImageStats, Pyramid, get_top_candidates
+from targets import get_packed_pixels, get_target_pixels
+from typing import Any, Dict, List, Optional
 
-def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
-    target_pixels = np.flip(np.array(target_image), 0)
+TOP_K = 16
+
+def run(target_image: Image, initial_config: Dict[str, Any], deadline: Optional[float] = None) -> List[Move]:
+    target_pixels = get_target_pixels(target_image)
+
+    image_stats = ImageStats(target_pixels, get_packed_pixels(target_image))
+    pyramid = Pyramid(target_pixels)
 
     moves = []
-    canvas = Canvas(initial_config)
+    canvas = Canvas(initial_config, target_image)
 
-    best_score = get_score(target_image, initial_config, moves)
+    best_score = canvas.get_score()
 
     block_queue = list(canvas.blocks.values())
-    while len(block_queue) > 0:
+    while len(block_queue) > 0 and (deadline is None or time.perf_counter() < deadline):
         block = block_queue.pop(0)
 
-        current_moves = moves
-        current_canvas = canvas
+        current_moves = []
         current_score = best_score
         current_new_blocks = []
 
+        splits = []
+        estimates = []
         for split_x in range(block.x + 10, block.x + block.width, 10):
             for split_y in range(block.y + 10, block.y + block.height, 10):
-                new_moves = moves.copy()
-                new_canvas = deepcopy(canvas)
-
-                new_moves.append(PointCutMove(block.id, split_x, split_y))
-                new_canvas.apply_move(new_moves[-1])
-
-                new_blocks = [new_canvas.get_block_by_id(f"{block.id}.{sub_id}") for sub_id in range(4)]
-                for new_block in new_blocks:
-                    common_r = np.argmax(np.bincount(target_pixels[new_block.y:new_block.y + new_block.height, new_block.x:new_block.x + new_block.width, 0].flatten()))
-                    common_g = np.argmax(np.bincount(target_pixels[new_block.y:new_block.y + new_block.height, new_block.x:new_block.x + new_block.width, 1].flatten()))
-                    common_b = np.argmax(np.bincount(target_pixels[new_block.y:new_block.y + new_block.height, new_block.x:new_block.x + new_block.width, 2].flatten()))
-                    common_a = np.argmax(np.bincount(target_pixels[new_block.y:new_block.y + new_block.height, new_block.x:new_block.x + new_block.width, 3].flatten()))
-                    color = Color(common_r, common_g, common_b, common_a)
-
-                    new_moves.append(ColorMove(new_block.id, color))
-                    new_canvas.apply_move(new_moves[-1])
-
-                new_score = get_score(target_image, initial_config, new_moves)
-                if new_score <= current_score:
-                    current_moves = new_moves
-                    current_canvas = new_canvas
-                    current_new_blocks = new_blocks
-                    current_score = new_score
-
-        if current_score <= best_score:
-            moves = current_moves
-            canvas = current_canvas
-            block_queue.extend(current_new_blocks)
-            best_score = current_score
+                estimate = 0
+                for x, y, width, height in [(block.x, block.y, split_x - block.x, split_y - block.y),
+                                            (split_x, block.y, block.x + block.width - split_x, split_y - block.y),
+                                            (split_x, split_y, block.x + block.width - split_x, block.y + block.height - split_y),
+                                            (block.x, split_y, split_x - block.x, block.y + block.height - split_y)]:
+                    color = image_stats.get_mean(x, y, width, height)
+                    estimate += round(5 * canvas.size / (width * height)) + 0.005 * pyramid.get_distance(x, y, width, height, color)
+
+                splits.append((split_x, split_y))
+                estimates.append(estimate)
+
+        for split_x, split_y in get_top_candidates(splits, estimates, TOP_K):
+            canvas.checkpoint()
+
+            new_moves = [PointCutMove(block.id, split_x, split_y)]
+            canvas.apply_move(new_moves[-1])
+
+            new_blocks = [canvas.get_block_by_id(f"{block.id}.{sub_id}") for sub_id in range(4)]
+            for new_block in new_blocks:
+                color = image_stats.get_optimal_color(new_block.x, new_block.y, new_block.width, new_block.height)
+
+                new_moves.append(ColorMove(new_block.id, color))
+                canvas.apply_move(new_moves[-1])
+
+            new_score = canvas.get_score()
+            if new_score <= current_score:
+                current_moves = new_moves
+                current_new_blocks = new_blocks
+                current_score = new_score
+
+            canvas.rollback()
+
+        for move in current_moves:
+            canvas.apply_move(move)
+
+        moves.extend(current_moves)
+        block_queue.extend(current_new_blocks)
+        best_score = current_score
 
     return moves
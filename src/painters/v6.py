@@ -1,27 +1,25 @@
 import numpy as np
-from core import Canvas, Color, ColorMove, Move, get_score
+from core import Canvas, ColorMove, Move
 from PIL import Image
+from stats import ImageStats
+from targets import get_packed_pixels, get_target_pixels
 from typing import Any, Dict, List
 
 def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
     moves = []
 
-    target_pixels = np.flip(np.array(target_image), 0)
-    canvas = Canvas(initial_config)
-
-    initial_score = get_score(target_image, initial_config, moves)
+    image_stats = ImageStats(get_target_pixels(target_image), get_packed_pixels(target_image))
+    canvas = Canvas(initial_config, target_image)
 
     for block in canvas.blocks.values():
-        common_r = np.argmax(np.bincount(target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 0].flatten()))
-        common_g = np.argmax(np.bincount(target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 1].flatten()))
-        common_b = np.argmax(np.bincount(target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 2].flatten()))
-        common_a = np.argmax(np.bincount(target_pixels[block.y:block.y + block.height, block.x:block.x + block.width, 3].flatten()))
-
-        color = Color(common_r, common_g, common_b, common_a)
-        move = ColorMove(block.id, color)
+        colors = list(dict.fromkeys([
+            image_stats.get_optimal_color(block.x, block.y, block.width, block.height),
+            image_stats.get_mean_color(block.x, block.y, block.width, block.height),
+            image_stats.get_mode_color(block.x, block.y, block.width, block.height)
+        ]))
 
-        new_score = get_score(target_image, initial_config, moves + [move])
-        if new_score < initial_score:
-            moves.append(move)
+        best = int(np.argmin(canvas.get_color_costs(block, colors)))
+        if best > 0:
+            moves.append(ColorMove(block.id, colors[best - 1]))
 
     return moves
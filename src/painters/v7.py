@@ -1,27 +1,25 @@
 import numpy as np
-from copy import deepcopy
-from core import Block, Canvas, Color, ColorMove, LineCutMove, Move, Orientation, get_score
+import time
+from core import Block, Canvas, Color, ColorMove, LineCutMove, Move, Orientation, evaluate_candidates
 from painters.v6 import run as v6
 from PIL import Image
-from scipy import stats
-from typing import Any, Dict, List
-
-def process(target_image: Image, canvas: Canvas, bounds: Block, min_bar_size: int, bar_orientation: Orientation) -> List[Move]:
-    target_pixels = np.flip(np.array(target_image), 0)
+from stats import ImageStats
+from targets import get_packed_pixels, get_target_pixels
+from typing import Any, Dict, List, Optional
 
+def process(image_stats: ImageStats, canvas: Canvas, bounds: Block, min_bar_size: int, bar_orientation: Orientation) -> List[Move]:
     bars = []
     position = bounds.x if bar_orientation == Orientation.VERTICAL else bounds.y
-    max_position = bounds.width if bar_orientation == Orientation.VERTICAL else bounds.height
+    max_position = bounds.x + bounds.width if bar_orientation == Orientation.VERTICAL else bounds.y + bounds.height
     while position < max_position:
         bar_start = position
         bar_size = min(min_bar_size, max_position - position)
 
         if bar_orientation == Orientation.VERTICAL:
-            bar_pixels = target_pixels[bounds.y:bounds.y + bounds.height, position:position + bar_size, :].reshape(-1, 4)
+            bar_color = image_stats.get_mode(position, bounds.y, bar_size, bounds.height)
         else:
-            bar_pixels = target_pixels[position:position + bar_size, bounds.x:bounds.x + bounds.height, :].reshape(-1, 4)
+            bar_color = image_stats.get_mode(bounds.x, position, bounds.width, bar_size)
 
-        bar_color = stats.mode(bar_pixels, keepdims=False).mode
         bars.append([bar_color, bar_start, bar_size])
 
         position += bar_size
@@ -54,47 +52,49 @@ def process(target_image: Image, canvas: Canvas, bounds: Block, min_bar_size: in
 
     return moves
 
-def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
-    canvas = Canvas(initial_config)
+def run(target_image: Image, initial_config: Dict[str, Any], deadline: Optional[float] = None) -> List[Move]:
+    canvas = Canvas(initial_config, target_image)
     if "0" not in canvas.blocks or canvas.blocks["0"].size != canvas.size:
         return v6(target_image, initial_config)
 
+    image_stats = ImageStats(get_target_pixels(target_image), get_packed_pixels(target_image))
+
     width, height = target_image.size
 
     best_moves = []
-    best_score = get_score(target_image, initial_config, best_moves)
+    best_score = canvas.get_score()
 
     block_queue = list(canvas.blocks.keys())
-    while len(block_queue) > 0:
+    while len(block_queue) > 0 and (deadline is None or time.perf_counter() < deadline):
         bounds = canvas.get_block_by_id(block_queue.pop(0))
 
-        possible_moves = []
+        candidates = []
+        for bar_orientation, max_bar_size in [(Orientation.VERTICAL, width), (Orientation.HORIZONTAL, height)]:
+            for min_bar_size in range(1, max_bar_size + 1):
+                if deadline is not None and time.perf_counter() >= deadline and len(candidates) > 0:
+                    break
 
-        for min_bar_size in range(1, width + 1):
-            canvas_copy = deepcopy(canvas)
-            possible_moves.append((canvas_copy, process(target_image, canvas_copy, bounds, min_bar_size, Orientation.VERTICAL)))
+                canvas.checkpoint()
+                candidates.append(process(image_stats, canvas, bounds, min_bar_size, bar_orientation))
+                canvas.rollback()
 
-        for min_bar_size in range(1, height + 1):
-            canvas_copy = deepcopy(canvas)
-            possible_moves.append((canvas_copy, process(target_image, canvas_copy, bounds, min_bar_size, Orientation.HORIZONTAL)))
-
-        local_canvas = canvas
-        local_moves = best_moves
+        local_moves = []
         local_score = best_score
 
-        for canvas_copy, moves in possible_moves:
-            score = get_score(target_image, initial_config, best_moves + moves)
-            if score < local_score:
-                local_canvas = canvas_copy
-                local_moves = best_moves + moves
-                local_score = score
+        scores, best = evaluate_candidates(canvas, candidates, deadline=deadline)
+        if scores[best] < local_score:
+            local_moves = candidates[best]
+            local_score = scores[best]
+
+        block_ids = set(canvas.blocks.keys())
+        for move in local_moves:
+            canvas.apply_move(move)
 
-        for block_id in local_canvas.blocks.keys():
-            if block_id not in canvas.blocks:
+        for block_id in canvas.blocks.keys():
+            if block_id not in block_ids:
                 block_queue.append(block_id)
 
-        canvas = local_canvas
-        best_moves = local_moves
+        best_moves.extend(local_moves)
         best_score = local_score
 
     return best_moves
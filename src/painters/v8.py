@@ -0,0 +1,125 @@
+import numpy as np
+from core import Block, Canvas, ColorMove, LineCutMove, Move, Orientation, PointCutMove
+from painters.v6 import run as v6
+from PIL import Image
+from stats import ImageStats
+from targets import get_packed_pixels, get_target_pixels
+from typing import Any, Dict, List
+
+GRID_SIZE = 40
+
+def get_cut_positions(start: int, size: int, grid_size: int) -> List[int]:
+    return list(range((start // grid_size + 1) * grid_size, start + size, grid_size))
+
+def paint(image_stats: ImageStats, canvas: Canvas, block: Block, grid_size: int = GRID_SIZE) -> List[Move]:
+    distance_sums = np.zeros((canvas.height + 1, canvas.width + 1), dtype=np.float64)
+    distance_sums[1:, 1:] = canvas.distances.cumsum(axis=0).cumsum(axis=1)
+
+    def get_current_distance(x: int, y: int, width: int, height: int) -> float:
+        return distance_sums[y + height, x + width] - distance_sums[y, x + width] - distance_sums[y + height, x] + distance_sums[y, x]
+
+    cell_xs = [block.x] + get_cut_positions(block.x, block.width, grid_size) + [block.x + block.width]
+    cell_ys = [block.y] + get_cut_positions(block.y, block.height, grid_size) + [block.y + block.height]
+    cell_columns = {x: column for column, x in enumerate(cell_xs)}
+    cell_rows = {y: row for row, y in enumerate(cell_ys)}
+
+    cell_sizes = np.zeros((len(cell_ys) - 1, len(cell_xs) - 1))
+    cell_means = np.zeros((len(cell_ys) - 1, len(cell_xs) - 1, 4))
+    cell_distances = np.zeros((len(cell_ys) - 1, len(cell_xs) - 1))
+    for row, (y1, y2) in enumerate(zip(cell_ys, cell_ys[1:])):
+        for column, (x1, x2) in enumerate(zip(cell_xs, cell_xs[1:])):
+            cell_sizes[row, column] = (x2 - x1) * (y2 - y1)
+            cell_means[row, column] = image_stats.get_mean(x1, y1, x2 - x1, y2 - y1)
+            cell_distances[row, column] = image_stats.get_optimal_distance(x1, y1, x2 - x1, y2 - y1)
+
+    def get_fill_distance(x: int, y: int, width: int, height: int) -> float:
+        color = image_stats.get_mean_color(x, y, width, height)
+        cells = (slice(cell_rows[y], cell_rows[y + height]), slice(cell_columns[x], cell_columns[x + width]))
+
+        offsets = np.sqrt(((cell_means[cells] - np.array([color.r, color.g, color.b, color.a])) ** 2).sum(axis=2)) * cell_sizes[cells]
+        return float(np.sqrt(offsets ** 2 + cell_distances[cells] ** 2).sum())
+
+    plans = {}
+
+    def get_plan(x: int, y: int, width: int, height: int) -> float:
+        key = (x, y, width, height)
+        if key in plans:
+            return plans[key][0]
+
+        block_size = width * height
+
+        fill_cost = round(5 * canvas.size / block_size) + 0.005 * get_fill_distance(x, y, width, height)
+
+        best_plan = (0.005 * get_current_distance(x, y, width, height), None)
+        if fill_cost < best_plan[0]:
+            best_plan = (fill_cost, ColorMove)
+
+        xs = get_cut_positions(x, width, grid_size)
+        ys = get_cut_positions(y, height, grid_size)
+
+        line_cut_cost = round(7 * canvas.size / block_size)
+        if line_cut_cost < best_plan[0]:
+            for cut_x in xs:
+                cost = line_cut_cost + get_plan(x, y, cut_x - x, height) + get_plan(cut_x, y, x + width - cut_x, height)
+                if cost < best_plan[0]:
+                    best_plan = (cost, (Orientation.VERTICAL, cut_x))
+
+            for cut_y in ys:
+                cost = line_cut_cost + get_plan(x, y, width, cut_y - y) + get_plan(x, cut_y, width, y + height - cut_y)
+                if cost < best_plan[0]:
+                    best_plan = (cost, (Orientation.HORIZONTAL, cut_y))
+
+        point_cut_cost = round(10 * canvas.size / block_size)
+        if point_cut_cost < best_plan[0]:
+            for cut_x in xs:
+                for cut_y in ys:
+                    cost = point_cut_cost \
+                        + get_plan(x, y, cut_x - x, cut_y - y) \
+                        + get_plan(cut_x, y, x + width - cut_x, cut_y - y) \
+                        + get_plan(cut_x, cut_y, x + width - cut_x, y + height - cut_y) \
+                        + get_plan(x, cut_y, cut_x - x, y + height - cut_y)
+                    if cost < best_plan[0]:
+                        best_plan = (cost, (cut_x, cut_y))
+
+        plans[key] = best_plan
+        return best_plan[0]
+
+    def emit(block: Block) -> List[Move]:
+        get_plan(block.x, block.y, block.width, block.height)
+        _, choice = plans[(block.x, block.y, block.width, block.height)]
+
+        if choice is None:
+            return []
+
+        if choice is ColorMove:
+            color, distance = image_stats.get_optimal_fill(block.x, block.y, block.width, block.height)
+            if round(5 * canvas.size / block.size) + 0.005 * distance >= 0.005 * get_current_distance(block.x, block.y, block.width, block.height):
+                return []
+
+            moves = [ColorMove(block.id, color)]
+            canvas.apply_move(moves[-1])
+            return moves
+
+        if isinstance(choice[0], Orientation):
+            moves = [LineCutMove(block.id, *choice)]
+            sub_ids = range(2)
+        else:
+            moves = [PointCutMove(block.id, *choice)]
+            sub_ids = range(4)
+
+        canvas.apply_move(moves[-1])
+
+        for sub_id in sub_ids:
+            moves.extend(emit(canvas.get_block_by_id(f"{block.id}.{sub_id}")))
+
+        return moves
+
+    return emit(block)
+
+def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
+    canvas = Canvas(initial_config, target_image)
+    if "0" not in canvas.blocks or canvas.blocks["0"].size != canvas.size:
+        return v6(target_image, initial_config)
+
+    image_stats = ImageStats(get_target_pixels(target_image), get_packed_pixels(target_image))
+    return paint(image_stats, canvas, canvas.blocks["0"])
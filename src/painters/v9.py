@@ -0,0 +1,25 @@
+from core import Canvas, Move, evaluate_candidates
+from merge import MergePlanner, get_grid
+from painters.v6 import run as v6
+from painters.v8 import paint
+from PIL import Image
+from stats import ImageStats
+from targets import get_packed_pixels, get_target_pixels
+from typing import Any, Dict, List
+
+def run(target_image: Image, initial_config: Dict[str, Any]) -> List[Move]:
+    canvas = Canvas(initial_config, target_image)
+
+    grid = get_grid(canvas, 0, 0, canvas.width, canvas.height)
+    if grid is None:
+        return v6(target_image, initial_config)
+
+    image_stats = ImageStats(get_target_pixels(target_image), get_packed_pixels(target_image))
+
+    moves, block_id = MergePlanner(canvas.size).merge(canvas, *grid)
+    moves.extend(paint(image_stats, canvas, canvas.get_block_by_id(block_id)))
+
+    candidates = [moves, v6(target_image, initial_config)]
+
+    _, best = evaluate_candidates(Canvas(initial_config, target_image), candidates)
+    return candidates[best]
@@ -0,0 +1,175 @@
+import numpy as np
+import random
+import time
+from collections import defaultdict
+from core import Block, Canvas, Color, ColorMove, LineCutMove, Move, Orientation, PointCutMove
+from PIL import Image
+from stats import ImageStats
+from targets import get_packed_pixels
+from typing import Any, Dict, List, Optional
+
+NUDGE_DISTANCES = [1, 2, 4, 8, 16]
+JITTER_DISTANCES = [1, 2, 4, 8, 16]
+
+class Polisher:
+    def __init__(self: "Polisher", target_image: Image, initial_config: Dict[str, Any], moves: List[Move], seed: int = 0) -> None:
+        self.canvas = Canvas(initial_config, target_image)
+        self.image_stats = ImageStats(self.canvas.target_pixels, get_packed_pixels(target_image))
+        self.random = random.Random(seed)
+
+        self.moves = []
+        self.blocks = []
+        self.replay(0, moves)
+
+        self.score = self.canvas.get_score()
+
+    def replay(self: "Polisher", index: int, moves: List[Move]) -> None:
+        while len(self.canvas.checkpoints) > index:
+            self.canvas.rollback()
+
+        del self.moves[index:]
+        del self.blocks[index:]
+
+        for move in moves:
+            self.canvas.checkpoint()
+
+            block = None
+            if isinstance(move, (LineCutMove, PointCutMove, ColorMove)):
+                block = self.canvas.get_block_by_id(move.block)
+
+            self.canvas.apply_move(move)
+
+            self.moves.append(move)
+            self.blocks.append(block)
+
+    def try_moves(self: "Polisher", index: int, moves: List[Move]) -> bool:
+        previous_moves = self.moves[index:]
+
+        try:
+            self.replay(index, moves)
+            score = self.canvas.get_score()
+        except ValueError:
+            score = None
+
+        if score is None or score > self.score:
+            self.replay(index, previous_moves)
+            return False
+
+        self.score = score
+        return True
+
+    def nudge_cut(self: "Polisher", index: int) -> Optional[List[Move]]:
+        move, block = self.moves[index], self.blocks[index]
+        distance = self.random.choice(NUDGE_DISTANCES) * self.random.choice([-1, 1])
+
+        if isinstance(move, LineCutMove):
+            if move.orientation == Orientation.VERTICAL:
+                start, end = block.x, block.x + block.width
+            else:
+                start, end = block.y, block.y + block.height
+
+            line = move.line + distance
+            if line <= start or line >= end:
+                return None
+
+            return [LineCutMove(move.block, move.orientation, line)]
+
+        x, y = move.x, move.y
+        if self.random.random() < 0.5:
+            x += distance
+        else:
+            y += distance
+
+        if x <= block.x or x >= block.x + block.width or y <= block.y or y >= block.y + block.height:
+            return None
+
+        return [PointCutMove(move.block, x, y)]
+
+    def get_visible_color(self: "Polisher", move: ColorMove, block: Block) -> Optional[Color]:
+        color = np.array([move.color.r, move.color.g, move.color.b, move.color.a], dtype=np.uint8)
+
+        pixels = self.canvas.pixels[block.y:block.y + block.height, block.x:block.x + block.width]
+        visible = (pixels == color).all(axis=2)
+        if not visible.any():
+            return None
+
+        target_pixels = self.canvas.target_pixels[block.y:block.y + block.height, block.x:block.x + block.width]
+        mean = np.round(target_pixels[visible].mean(axis=0)).astype(int)
+
+        return Color(*(int(value) for value in mean))
+
+    def recolor(self: "Polisher", index: int) -> Optional[List[Move]]:
+        move, block = self.moves[index], self.blocks[index]
+
+        strategy = self.random.randrange(3)
+        if strategy == 0:
+            color = self.image_stats.get_optimal_color(block.x, block.y, block.width, block.height)
+        elif strategy == 1:
+            color = self.get_visible_color(move, block)
+        else:
+            values = [move.color.r, move.color.g, move.color.b, move.color.a]
+            channel = self.random.randrange(4)
+            values[channel] = min(max(values[channel] + self.random.choice(JITTER_DISTANCES) * self.random.choice([-1, 1]), 0), 255)
+            color = Color(*values)
+
+        if color is None or color == move.color:
+            return None
+
+        return [ColorMove(move.block, color)]
+
+    def is_child_color(self: "Polisher", move: Move, parent_id: str) -> bool:
+        return isinstance(move, ColorMove) and "." in move.block and move.block.rsplit(".", 1)[0] == parent_id
+
+    def hoist_color(self: "Polisher", index: int) -> Optional[List[Move]]:
+        move = self.moves[index]
+
+        counts = defaultdict(int)
+        for other_move in self.moves[index + 1:]:
+            if self.is_child_color(other_move, move.block):
+                counts[other_move.color] += 1
+
+        if len(counts) == 0:
+            return None
+
+        color = max(counts, key=counts.get)
+        if counts[color] < 2:
+            return None
+
+        return [ColorMove(move.block, color), move] + [other_move for other_move in self.moves[index + 1:]
+                                                       if not (self.is_child_color(other_move, move.block) and other_move.color == color)]
+
+    def get_mutation(self: "Polisher", index: int) -> Optional[List[Move]]:
+        move = self.moves[index]
+
+        if isinstance(move, (LineCutMove, PointCutMove)):
+            if self.random.random() < 0.25:
+                return self.hoist_color(index)
+
+            replacement = self.nudge_cut(index)
+        elif isinstance(move, ColorMove):
+            if self.random.random() < 0.25:
+                return self.moves[index + 1:]
+
+            replacement = self.recolor(index)
+        else:
+            return None
+
+        return replacement + self.moves[index + 1:] if replacement is not None else None
+
+    def step(self: "Polisher") -> bool:
+        index = self.random.randrange(len(self.moves))
+
+        moves = self.get_mutation(index)
+        if moves is None:
+            return False
+
+        return self.try_moves(index, moves)
+
+def polish(target_image: Image, initial_config: Dict[str, Any], moves: List[Move], seconds: float, seed: int = 0) -> List[Move]:
+    polisher = Polisher(target_image, initial_config, moves, seed)
+
+    deadline = time.perf_counter() + seconds
+    while len(polisher.moves) > 0 and time.perf_counter() < deadline:
+        polisher.step()
+
+    return polisher.moves
@@ -0,0 +1,132 @@
+import core
+import kernels
+import sys
+import time
+from collections import defaultdict
+from core import Canvas, ColorMove, Move, SwapMove
+from functools import wraps
+from pathlib import Path
+from stats import ImageStats
+from typing import Any, Callable, Dict, List
+
+class Profiler:
+    def __init__(self: "Profiler") -> None:
+        self.timers = defaultdict(float)
+        self.counters = defaultdict(int)
+
+        self.phases = []
+        self.phase_start = 0.0
+        self.patches = []
+
+    def enter(self: "Profiler", phase: str) -> None:
+        now = time.perf_counter()
+        if len(self.phases) > 0:
+            self.timers[self.phases[-1]] += now - self.phase_start
+
+        self.phases.append(phase)
+        self.phase_start = now
+
+    def exit(self: "Profiler") -> None:
+        now = time.perf_counter()
+        self.timers[self.phases.pop()] += now - self.phase_start
+        self.phase_start = now
+
+    def wrap(self: "Profiler", function: Callable[..., Any], phase: str, counter: str) -> Callable[..., Any]:
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            self.counters[counter] += 1
+
+            self.enter(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.exit()
+
+        return wrapper
+
+    def wrap_apply_move(self: "Profiler", function: Callable[[Canvas, Move], int]) -> Callable[[Canvas, Move], int]:
+        @wraps(function)
+        def wrapper(canvas: Canvas, move: Move) -> int:
+            self.counters[f"moves.{type(move).__name__}"] += 1
+
+            self.enter("simulation")
+            try:
+                cost = function(canvas, move)
+
+                if isinstance(move, ColorMove):
+                    self.counters["pixels_written"] += canvas.blocks[move.block].size
+                elif isinstance(move, SwapMove):
+                    self.counters["pixels_written"] += 2 * canvas.blocks[move.block1].size
+
+                return cost
+            finally:
+                self.exit()
+
+        return wrapper
+
+    def patch(self: "Profiler", owner: Any, name: str, replacement: Callable[..., Any]) -> None:
+        self.patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def patch_function(self: "Profiler", module: Any, name: str, phase: str, counter: str) -> None:
+        function = getattr(module, name)
+        replacement = self.wrap(function, phase, counter)
+
+        source_directory = Path(__file__).parent.resolve()
+        for loaded_module in list(sys.modules.values()):
+            module_file = getattr(loaded_module, "__file__", None)
+            if module_file is None or source_directory not in Path(module_file).resolve().parents:
+                continue
+
+            if getattr(loaded_module, name, None) is function:
+                self.patch(loaded_module, name, replacement)
+
+    def enable(self: "Profiler") -> None:
+        self.patch(Canvas, "__init__", self.wrap(Canvas.__init__, "simulation", "canvases_created"))
+        self.patch(Canvas, "apply_move", self.wrap_apply_move(Canvas.apply_move))
+        self.patch(Canvas, "add_block", self.wrap(Canvas.add_block, "simulation", "blocks_created"))
+
+        self.patch(Canvas, "get_block_by_id", self.wrap(Canvas.get_block_by_id, "lookups", "lookups.get_block_by_id"))
+        self.patch(Canvas, "get_block_by_pixel", self.wrap(Canvas.get_block_by_pixel, "lookups", "lookups.get_block_by_pixel"))
+        self.patch(Canvas, "get_blocks_by_area", self.wrap(Canvas.get_blocks_by_area, "lookups", "lookups.get_blocks_by_area"))
+
+        self.patch(kernels, "fill", self.wrap(kernels.fill, "kernels", "kernels.fill"))
+        self.patch(kernels, "swap", self.wrap(kernels.swap, "kernels", "kernels.swap"))
+        self.patch(Canvas, "update_distances", self.wrap(Canvas.update_distances, "scoring", "distance_updates"))
+        self.patch(Canvas, "get_score", self.wrap(Canvas.get_score, "scoring", "scores"))
+        self.patch_function(core, "get_score", "scoring", "calls.get_score")
+        self.patch_function(core, "simulate", "scoring", "calls.simulate")
+        self.patch_function(core, "evaluate_candidates", "scoring", "calls.evaluate_candidates")
+
+        self.patch(Canvas, "__deepcopy__", self.wrap(Canvas.__deepcopy__, "deepcopy", "deepcopies"))
+
+        self.patch(Canvas, "checkpoint", self.wrap(Canvas.checkpoint, "transactions", "checkpoints"))
+        self.patch(Canvas, "commit", self.wrap(Canvas.commit, "transactions", "commits"))
+        self.patch(Canvas, "rollback", self.wrap(Canvas.rollback, "transactions", "rollbacks"))
+
+        for name, function in list(vars(ImageStats).items()):
+            if callable(function) and (name == "__init__" or not name.startswith("_")):
+                self.patch(ImageStats, name, self.wrap(function, "statistics", f"statistics.{name.strip('_')}"))
+
+    def disable(self: "Profiler") -> None:
+        while len(self.patches) > 0:
+            owner, name, original = self.patches.pop()
+            setattr(owner, name, original)
+
+    def get_report(self: "Profiler") -> Dict[str, Any]:
+        return {
+            "total": sum(self.timers.values()),
+            "phases": dict(sorted(self.timers.items(), key=lambda item: -item[1])),
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    lines = []
+
+    for phase, seconds in report["phases"].items():
+        lines.append(f"{phase}: {seconds:,.3f}s ({seconds / max(report['total'], 1e-9):.0%})")
+
+    for counter, value in report["counters"].items():
+        lines.append(f"{counter}: {value:,.0f}")
+
+    return lines
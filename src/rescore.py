@@ -0,0 +1,83 @@
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core import Canvas, parse_isl
+from history import BEST_PAINTER, connect, record_run
+from pathlib import Path
+from PIL import Image
+from run import update_overview
+from typing import Optional, Tuple
+
+def rescore(isl_file: Path) -> Tuple[Optional[int], Optional[str]]:
+    input_directory = Path(__file__).parent.parent / "results" / "input"
+
+    image = Image.open(input_directory / f"{isl_file.stem}.png")
+    initial_config = json.loads((input_directory / f"{isl_file.stem}.json").read_text(encoding="utf-8"))
+
+    canvas = Canvas(initial_config, image)
+
+    try:
+        for line_number, move in parse_isl(isl_file.read_text(encoding="utf-8")):
+            try:
+                canvas.apply_move(move)
+            except Exception as e:
+                return None, f"line {line_number}: {e} ({move.to_isl()})"
+    except ValueError as e:
+        return None, str(e)
+
+    return canvas.get_score(), None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rescore the results of painters.")
+    parser.add_argument("painters", type=str, nargs="*", help="the painters to rescore the results of (defaults to all painters)")
+    parser.add_argument("--jobs", type=int, default=1, help="the number of results to rescore in parallel (defaults to 1)")
+
+    args = parser.parse_args()
+
+    outputs_root = Path(__file__).parent.parent / "results" / "output"
+
+    if len(args.painters) > 0:
+        output_directories = [outputs_root / painter for painter in args.painters]
+        for output_directory in output_directories:
+            if not output_directory.is_dir():
+                raise RuntimeError(f"{output_directory} does not exist")
+    else:
+        output_directories = sorted(directory for directory in outputs_root.iterdir() if directory.is_dir())
+
+    isl_files = [file for directory in output_directories for file in sorted(directory.glob("*.isl"), key=lambda file: int(file.stem))]
+
+    history = connect()
+
+    invalid_files = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(rescore, isl_file): isl_file for isl_file in isl_files}
+
+        for future in as_completed(futures):
+            isl_file = futures[future]
+            score, error = future.result()
+
+            if error is not None:
+                invalid_files += 1
+                print(f"{isl_file.parent.name}/{isl_file.stem}: invalid, {error}")
+                continue
+
+            score_file = isl_file.parent / f"{isl_file.stem}.txt"
+            previous_score = int(score_file.read_text(encoding="utf-8")) if score_file.is_file() else None
+
+            with score_file.open("w+", encoding="utf-8") as file:
+                file.write(str(int(score)))
+
+            if previous_score != score and isl_file.parent.name != BEST_PAINTER:
+                record_run(history, isl_file.parent.name, isl_file.stem, score)
+
+            if previous_score is not None and previous_score != score:
+                print(f"{isl_file.parent.name}/{isl_file.stem}: {score:,.0f} (was {previous_score:,.0f})")
+            else:
+                print(f"{isl_file.parent.name}/{isl_file.stem}: {score:,.0f}")
+
+    print(f"Rescored {len(isl_files) - invalid_files:,.0f} results, {invalid_files:,.0f} invalid")
+
+    update_overview()
+
+if __name__ == "__main__":
+    main()
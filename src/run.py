@@ -1,22 +1,24 @@
 import argparse
+import ast
+import hashlib
 import importlib
+import inspect
 import json
-from core import Canvas, get_score
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core import simulate
+from history import connect, get_latest_scores, record_run
 from pathlib import Path
 from PIL import Image
+from polish import polish
+from profiler import Profiler, format_report
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-def update_overview() -> None:
-    scores_by_painter = {}
-    outputs_root = Path(__file__).parent.parent / "results" / "output"
-
-    for directory in outputs_root.iterdir():
-        scores_by_image = {}
-
-        for file in directory.iterdir():
-            if file.name.endswith(".txt"):
-                scores_by_image[file.stem] = int(file.read_text(encoding="utf-8"))
+TIME_BUDGET_FLOOR = 0.1
 
-        scores_by_painter[directory.name] = scores_by_image
+def update_overview() -> None:
+    scores_by_painter = get_latest_scores(connect())
 
     overview_template_file = Path(__file__).parent.parent / "results" / "overview.tmpl.html"
     overview_file = Path(__file__).parent.parent / "results" / "overview.html"
@@ -29,48 +31,275 @@ def update_overview() -> None:
 
     print(f"Overview: file://{overview_file}")
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Run a painter.")
-    parser.add_argument("painter", type=str, help="the painter to run")
-    parser.add_argument("--image", type=int, help="the image to run on (defaults to all images)")
+def get_painter_hash(painter_name: str) -> str:
+    sources = {}
 
-    args = parser.parse_args()
+    pending_modules = [f"painters.{painter_name}"]
+    while len(pending_modules) > 0:
+        module = pending_modules.pop()
 
-    painter = importlib.import_module(f"painters.{args.painter}")
-    output_directory = Path(__file__).parent.parent / "results" / "output" / args.painter
-    output_directory.mkdir(parents=True, exist_ok=True)
+        module_file = Path(__file__).parent / f"{module.replace('.', '/')}.py"
+        if module in sources or not module_file.is_file():
+            continue
 
-    total_score = 0
+        sources[module] = module_file.read_bytes()
 
-    if args.image is not None:
-        image_files = [Path(__file__).parent.parent / "results" / "input" / f"{args.image}.png"]
-        if not image_files[0].is_file():
-            raise RuntimeError(f"{image_files[0]} does not exist")
-    else:
-        image_files = sorted((Path(__file__).parent.parent / "results" / "input").glob("*.png"), key=lambda file: int(file.stem))
+        for node in ast.walk(ast.parse(sources[module])):
+            if isinstance(node, ast.Import):
+                pending_modules.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+                pending_modules.append(node.module)
 
-    for image_file in image_files:
-        image = Image.open(image_file)
+    hasher = hashlib.sha256()
+    for module in sorted(sources.keys()):
+        hasher.update(module.encode("utf-8") + b"\0" + sources[module] + b"\0")
+
+    return hasher.hexdigest()
+
+def get_image_hash(image_file: Path) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(image_file.read_bytes())
+    hasher.update((image_file.parent / f"{image_file.stem}.json").read_bytes())
+
+    return hasher.hexdigest()
+
+def load_cache() -> Dict[str, Any]:
+    cache_file = Path(__file__).parent.parent / "results" / "cache.json"
+    if not cache_file.is_file():
+        return {}
+
+    return json.loads(cache_file.read_text(encoding="utf-8"))
+
+def save_cache(cache: Dict[str, Any]) -> None:
+    cache_file = Path(__file__).parent.parent / "results" / "cache.json"
+
+    with cache_file.open("w+", encoding="utf-8") as file:
+        file.write(json.dumps(cache, indent=4))
 
-        initial_config = json.loads((image_file.parent / f"{image_file.stem}.json").read_text(encoding="utf-8"))
+def supports_deadline(painter_name: str) -> bool:
+    painter = importlib.import_module(f"painters.{painter_name}")
+    return "deadline" in inspect.signature(painter.run).parameters
 
-        moves = painter.run(image, initial_config)
+def get_time_budgets(history: sqlite3.Connection, painter_name: str, image_files: List[Path], time_budget: float, jobs: int) -> Dict[str, float]:
+    scores_by_painter = get_latest_scores(history)
+    scores_by_image = scores_by_painter.get(painter_name, {})
 
-        score = get_score(image, initial_config, moves)
-        total_score += score
+    best_scores = {}
+    for scores in scores_by_painter.values():
+        for image, score in scores.items():
+            best_scores[image] = min(score, best_scores.get(image, score))
+
+    gaps = {image_file.stem: scores_by_image[image_file.stem] - best_scores[image_file.stem]
+            for image_file in image_files if image_file.stem in scores_by_image}
+    mean_gap = sum(gaps.values()) / len(gaps) if len(gaps) > 0 else 0
+
+    weights = {image_file.stem: max(gaps.get(image_file.stem, mean_gap), TIME_BUDGET_FLOOR * mean_gap) for image_file in image_files}
+    total_weight = sum(weights.values())
+
+    if total_weight == 0:
+        weights = {image_file.stem: 1 for image_file in image_files}
+        total_weight = len(image_files)
+
+    return {image: time_budget * min(jobs, len(image_files)) * weight / total_weight for image, weight in weights.items()}
+
+def load_target(image_file: Path) -> Tuple[Image.Image, Dict[str, Any]]:
+    image = Image.open(image_file)
+    initial_config = json.loads((image_file.parent / f"{image_file.stem}.json").read_text(encoding="utf-8"))
+
+    return image, initial_config
+
+def solve(painter_name: str,
+          image_file: Path,
+          output_directory: Path,
+          profile: bool = False,
+          polish_seconds: float = 0,
+          time_budget: Optional[float] = None,
+          target: Optional[Tuple[Image.Image, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    painter = importlib.import_module(f"painters.{painter_name}")
+
+    image, initial_config = target if target is not None else load_target(image_file)
+
+    profiler = Profiler() if profile else None
+    if profiler is not None:
+        profiler.enable()
+        profiler.enter("painter")
+
+    start_time = time.perf_counter()
+
+    try:
+        if time_budget is not None:
+            moves = painter.run(image, initial_config, deadline=start_time + time_budget)
+        else:
+            moves = painter.run(image, initial_config)
+
+        if polish_seconds > 0:
+            if profiler is not None:
+                profiler.exit()
+                profiler.enter("polish")
+
+            moves = polish(image, initial_config, moves, polish_seconds)
+
+        runtime = time.perf_counter() - start_time
+
+        if profiler is not None:
+            profiler.exit()
+            profiler.enter("output")
+
+        canvas = simulate(image, initial_config, moves)
+        score = canvas.get_score()
 
         with (output_directory / f"{image_file.stem}.isl").open("w+", encoding="utf-8") as file:
             file.write("\n".join(move.to_isl() for move in moves) + "\n")
 
-        canvas = Canvas(initial_config)
-        for move in moves:
-            canvas.apply_move(move)
         canvas.save_to_image(output_directory / f"{image_file.stem}.png")
 
         with (output_directory / f"{image_file.stem}.txt").open("w+", encoding="utf-8") as file:
             file.write(str(int(score)))
+    finally:
+        if profiler is not None:
+            profiler.exit()
+            profiler.disable()
+
+    result = {
+        "score": score,
+        "cost": canvas.cost,
+        "similarity": canvas.get_similarity(),
+        "moves": len(moves),
+        "runtime": runtime,
+        "profile": None,
+        "cached": False
+    }
+
+    if profiler is None:
+        return result
+
+    result["profile"] = profiler.get_report()
+
+    profile_directory = Path(__file__).parent.parent / "results" / "profiles" / painter_name
+    profile_directory.mkdir(parents=True, exist_ok=True)
 
-        print(f"{image_file.stem}: {score:,.0f}")
+    with (profile_directory / f"{image_file.stem}.json").open("w+", encoding="utf-8") as file:
+        file.write(json.dumps(result["profile"], indent=4))
+
+    return result
+
+def print_result(image_file: Path, result: Dict[str, Any]) -> None:
+    if result["cached"]:
+        print(f"{image_file.stem}: {result['score']:,.0f} (cached)")
+        return
+
+    print(f"{image_file.stem}: {result['score']:,.0f}")
+
+    if result["profile"] is not None:
+        for line in format_report(result["profile"]):
+            print(f"    {line}")
+
+def get_image_files(image: Optional[int] = None) -> List[Path]:
+    input_directory = Path(__file__).parent.parent / "results" / "input"
+
+    if image is None:
+        return sorted(input_directory.glob("*.png"), key=lambda file: int(file.stem))
+
+    image_file = input_directory / f"{image}.png"
+    if not image_file.is_file():
+        raise RuntimeError(f"{image_file} does not exist")
+
+    return [image_file]
+
+def get_output_name(painter_name: str, polish_seconds: float = 0) -> str:
+    return painter_name if polish_seconds == 0 else f"{painter_name}-polish"
+
+def run_painter(painter_name: str,
+                image_files: List[Path],
+                jobs: int = 1,
+                force: bool = False,
+                profile: bool = False,
+                polish_seconds: float = 0,
+                time_budget: Optional[float] = None,
+                get_target: Optional[Callable[[Path, str], Tuple[Image.Image, Dict[str, Any]]]] = None) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+    importlib.import_module(f"painters.{painter_name}")
+    if time_budget is not None and not supports_deadline(painter_name):
+        raise RuntimeError(f"Painter {painter_name} does not support deadlines")
+
+    output_name = get_output_name(painter_name, polish_seconds)
+
+    output_directory = Path(__file__).parent.parent / "results" / "output" / output_name
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    history = connect()
+
+    cache = load_cache()
+    painter_cache = cache.setdefault(painter_name, {})
+    painter_hash = get_painter_hash(painter_name)
+
+    pending_files = []
+    for image_file in image_files:
+        image_hash = get_image_hash(image_file)
+        output_files = [output_directory / f"{image_file.stem}.{extension}" for extension in ["isl", "png", "txt"]]
+
+        if not force and not profile and polish_seconds == 0 and time_budget is None \
+                and painter_cache.get(image_file.stem) == {"painter_hash": painter_hash, "image_hash": image_hash} \
+                and all(file.is_file() for file in output_files):
+            yield image_file, {"score": int(output_files[-1].read_text(encoding="utf-8")), "cached": True}
+        else:
+            if output_name == painter_name:
+                painter_cache.pop(image_file.stem, None)
+
+            pending_files.append((image_file, image_hash))
+
+    time_budgets = {}
+    if time_budget is not None and len(pending_files) > 0:
+        time_budgets = get_time_budgets(history, painter_name, [image_file for image_file, _ in pending_files], time_budget, jobs)
+
+    def store_result(image_file: Path, image_hash: str, result: Dict[str, Any]) -> None:
+        if time_budget is None and output_name == painter_name:
+            painter_cache[image_file.stem] = {"painter_hash": painter_hash, "image_hash": image_hash}
+
+        save_cache(cache)
+
+        record_run(history, output_name, image_file.stem, result["score"], result["cost"], result["similarity"],
+                   result["moves"], result["runtime"], painter_hash)
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(solve, painter_name, image_file, output_directory, profile, polish_seconds,
+                                       time_budgets.get(image_file.stem)): (image_file, image_hash)
+                       for image_file, image_hash in pending_files}
+
+            for future in as_completed(futures):
+                image_file, image_hash = futures[future]
+
+                result = future.result()
+                store_result(image_file, image_hash, result)
+
+                yield image_file, result
+    else:
+        for image_file, image_hash in pending_files:
+            target = get_target(image_file, image_hash) if get_target is not None else None
+
+            result = solve(painter_name, image_file, output_directory, profile, polish_seconds, time_budgets.get(image_file.stem), target)
+            store_result(image_file, image_hash, result)
+
+            yield image_file, result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a painter.")
+    parser.add_argument("painter", type=str, help="the painter to run")
+    parser.add_argument("--image", type=int, help="the image to run on (defaults to all images)")
+    parser.add_argument("--jobs", type=int, default=1, help="the number of images to solve in parallel (defaults to 1)")
+    parser.add_argument("--force", action="store_true", help="rerun the painter on images with cached results")
+    parser.add_argument("--profile", action="store_true", help="print and save a per-phase time breakdown of each image, implies --force")
+    parser.add_argument("--time-budget", type=float, metavar="SECONDS", help="the total number of seconds the painter may spend on all images, split across images in proportion to how far the painter's previous score is from the best known score, implies --force")
+    parser.add_argument("--polish", type=float, default=0, metavar="SECONDS", help="spend this many seconds per image improving the painter's moves with local search and store the results as <painter>-polish, implies --force")
+
+    args = parser.parse_args()
+
+    image_files = get_image_files(args.image)
+
+    total_score = 0
+    for image_file, result in run_painter(args.painter, image_files, args.jobs, args.force, args.profile, args.polish, args.time_budget):
+        total_score += result["score"]
+        print_result(image_file, result)
 
     if len(image_files) > 1:
         print(f"Total score: {total_score:,.0f}")
@@ -0,0 +1,175 @@
+import numpy as np
+from collections import OrderedDict
+from core import Color
+from targets import pack_colors
+from typing import Any, List, Optional, Tuple
+
+MAX_DISTANCE = np.sqrt(4 * 255 ** 2)
+
+MEDIAN_ITERATIONS = 32
+MEDIAN_SAMPLE_SIZE = 1024
+MEDIAN_TOLERANCE = 0.05
+OPTIMAL_FILL_CACHE_SIZE = 65536
+PYRAMID_MIN_CELLS = 32
+HISTOGRAM_TILE_SIZE = 16
+
+def get_distance(pixels: np.ndarray, color: np.ndarray) -> float:
+    return np.sqrt(((pixels - color) ** 2).sum(axis=1)).sum()
+
+def unpack_color(value: int) -> np.ndarray:
+    return np.array([(value >> 24) & 255, (value >> 16) & 255, (value >> 8) & 255, value & 255])
+
+def get_histogram(packed_pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return np.unique(packed_pixels, return_counts=True)
+
+def merge_histograms(histograms: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    if len(histograms) == 1:
+        return histograms[0]
+
+    colors, inverse = np.unique(np.concatenate([colors for colors, _ in histograms]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([counts for _, counts in histograms]), minlength=len(colors))
+
+    return colors, counts.astype(np.int64)
+
+def get_top_candidates(candidates: List[Any], estimates: List[float], top_k: int) -> List[Any]:
+    selected = set(np.argsort(estimates, kind="stable")[:top_k].tolist())
+    return [candidate for i, candidate in enumerate(candidates) if i in selected]
+
+class Pyramid:
+    def __init__(self: "Pyramid", target_pixels: np.ndarray) -> None:
+        self.levels = [target_pixels.astype(np.float64)]
+
+        while min(self.levels[-1].shape[:2]) >= 2 * PYRAMID_MIN_CELLS:
+            height, width = self.levels[-1].shape[0] // 2 * 2, self.levels[-1].shape[1] // 2 * 2
+            pixels = self.levels[-1][:height, :width]
+            self.levels.append((pixels[0::2, 0::2] + pixels[1::2, 0::2] + pixels[0::2, 1::2] + pixels[1::2, 1::2]) / 4)
+
+    def get_level(self: "Pyramid", width: int, height: int) -> int:
+        level = 0
+        while level + 1 < len(self.levels) and min(width, height) >> (level + 1) >= PYRAMID_MIN_CELLS:
+            level += 1
+
+        return level
+
+    def get_distance(self: "Pyramid", x: int, y: int, width: int, height: int, color: np.ndarray, level: Optional[int] = None) -> float:
+        if level is None:
+            level = self.get_level(width, height)
+
+        pixels = self.levels[level]
+
+        x1 = max(min((x + width) >> level, pixels.shape[1]), min(x >> level, pixels.shape[1] - 1) + 1)
+        y1 = max(min((y + height) >> level, pixels.shape[0]), min(y >> level, pixels.shape[0] - 1) + 1)
+        cells = pixels[min(y >> level, y1 - 1):y1, min(x >> level, x1 - 1):x1].reshape(-1, 4)
+
+        return get_distance(cells, color) * width * height / len(cells)
+
+class ImageStats:
+    def __init__(self: "ImageStats", target_pixels: np.ndarray, packed_pixels: Optional[np.ndarray] = None) -> None:
+        self.pixels = target_pixels
+        self.height, self.width = target_pixels.shape[:2]
+
+        pixels = target_pixels.astype(np.int64)
+
+        self.sums = np.zeros((self.height + 1, self.width + 1, 4), dtype=np.int64)
+        self.sums[1:, 1:] = pixels.cumsum(axis=0).cumsum(axis=1)
+
+        self.square_sums = np.zeros((self.height + 1, self.width + 1), dtype=np.int64)
+        self.square_sums[1:, 1:] = (pixels ** 2).sum(axis=2).cumsum(axis=0).cumsum(axis=1)
+
+        self.packed_pixels = packed_pixels if packed_pixels is not None else pack_colors(target_pixels)
+        self.tile_histograms = {}
+
+        self.optimal_fills = OrderedDict()
+
+    def get_sum(self: "ImageStats", x: int, y: int, width: int, height: int) -> np.ndarray:
+        return self.sums[y + height, x + width] - self.sums[y, x + width] - self.sums[y + height, x] + self.sums[y, x]
+
+    def get_square_sum(self: "ImageStats", x: int, y: int, width: int, height: int) -> int:
+        return int(self.square_sums[y + height, x + width] - self.square_sums[y, x + width] - self.square_sums[y + height, x] + self.square_sums[y, x])
+
+    def get_mean(self: "ImageStats", x: int, y: int, width: int, height: int) -> np.ndarray:
+        return self.get_sum(x, y, width, height) / (width * height)
+
+    def get_mean_color(self: "ImageStats", x: int, y: int, width: int, height: int) -> Color:
+        return Color(*(round(float(value)) for value in self.get_mean(x, y, width, height)))
+
+    def get_squared_error(self: "ImageStats", x: int, y: int, width: int, height: int) -> float:
+        sums = self.get_sum(x, y, width, height)
+        return max(self.get_square_sum(x, y, width, height) - float((sums ** 2).sum()) / (width * height), 0.0)
+
+    def get_distance_lower_bound(self: "ImageStats", x: int, y: int, width: int, height: int) -> float:
+        squared_error = self.get_squared_error(x, y, width, height)
+        return max(np.sqrt(squared_error), squared_error / MAX_DISTANCE)
+
+    def get_tile_histogram(self: "ImageStats", tile_x: int, tile_y: int) -> Tuple[np.ndarray, np.ndarray]:
+        key = (tile_x, tile_y)
+        if key not in self.tile_histograms:
+            x, y = tile_x * HISTOGRAM_TILE_SIZE, tile_y * HISTOGRAM_TILE_SIZE
+            self.tile_histograms[key] = get_histogram(self.packed_pixels[y:y + HISTOGRAM_TILE_SIZE, x:x + HISTOGRAM_TILE_SIZE])
+
+        return self.tile_histograms[key]
+
+    def get_histogram(self: "ImageStats", x: int, y: int, width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+        tile_x1 = -(-x // HISTOGRAM_TILE_SIZE)
+        tile_y1 = -(-y // HISTOGRAM_TILE_SIZE)
+        tile_x2 = (x + width) // HISTOGRAM_TILE_SIZE if x + width < self.width else -(-self.width // HISTOGRAM_TILE_SIZE)
+        tile_y2 = (y + height) // HISTOGRAM_TILE_SIZE if y + height < self.height else -(-self.height // HISTOGRAM_TILE_SIZE)
+
+        if tile_x1 >= tile_x2 or tile_y1 >= tile_y2:
+            return get_histogram(self.packed_pixels[y:y + height, x:x + width])
+
+        inner_x1, inner_y1 = tile_x1 * HISTOGRAM_TILE_SIZE, tile_y1 * HISTOGRAM_TILE_SIZE
+        inner_x2, inner_y2 = min(tile_x2 * HISTOGRAM_TILE_SIZE, x + width), min(tile_y2 * HISTOGRAM_TILE_SIZE, y + height)
+
+        histograms = [self.get_tile_histogram(tile_x, tile_y) for tile_y in range(tile_y1, tile_y2) for tile_x in range(tile_x1, tile_x2)]
+        for border in [self.packed_pixels[y:inner_y1, x:x + width],
+                       self.packed_pixels[inner_y2:y + height, x:x + width],
+                       self.packed_pixels[inner_y1:inner_y2, x:inner_x1],
+                       self.packed_pixels[inner_y1:inner_y2, inner_x2:x + width]]:
+            if border.size > 0:
+                histograms.append(get_histogram(border))
+
+        return merge_histograms(histograms)
+
+    def get_mode(self: "ImageStats", x: int, y: int, width: int, height: int) -> np.ndarray:
+        colors, counts = self.get_histogram(x, y, width, height)
+        return unpack_color(int(colors[np.argmax(counts)]))
+
+    def get_mode_color(self: "ImageStats", x: int, y: int, width: int, height: int) -> Color:
+        return Color(*(int(value) for value in self.get_mode(x, y, width, height)))
+
+    def get_optimal_color(self: "ImageStats", x: int, y: int, width: int, height: int) -> Color:
+        return self.get_optimal_fill(x, y, width, height)[0]
+
+    def get_optimal_distance(self: "ImageStats", x: int, y: int, width: int, height: int) -> float:
+        return self.get_optimal_fill(x, y, width, height)[1]
+
+    def get_optimal_fill(self: "ImageStats", x: int, y: int, width: int, height: int) -> Tuple[Color, float]:
+        key = (x, y, width, height)
+        if key in self.optimal_fills:
+            self.optimal_fills.move_to_end(key)
+            return self.optimal_fills[key]
+
+        pixels = self.pixels[y:y + height, x:x + width].reshape(-1, 4).astype(np.int32)
+        seeds = [self.get_mean(x, y, width, height), self.get_mode(x, y, width, height)]
+
+        samples = pixels[::max(len(pixels) // MEDIAN_SAMPLE_SIZE, 1)].astype(np.float64)
+        median = min(seeds, key=lambda seed: get_distance(samples, seed))
+        for _ in range(MEDIAN_ITERATIONS):
+            weights = 1 / np.maximum(np.sqrt(((samples - median) ** 2).sum(axis=1)), 1e-9)
+            new_median = weights @ samples / weights.sum()
+
+            converged = np.abs(new_median - median).max() < MEDIAN_TOLERANCE
+            median = new_median
+            if converged:
+                break
+
+        candidates = dict.fromkeys(tuple(int(round(value)) for value in candidate) for candidate in seeds + [median])
+        fills = [(Color(*candidate), get_distance(pixels, np.array(candidate, dtype=np.int32))) for candidate in candidates]
+        fill = min(fills, key=lambda fill: fill[1])
+
+        self.optimal_fills[key] = fill
+        if len(self.optimal_fills) > OPTIMAL_FILL_CACHE_SIZE:
+            self.optimal_fills.popitem(last=False)
+
+        return fill
@@ -1,14 +1,74 @@
 import argparse
+import json
 import os
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import StringIO
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict
+from urllib3.util.retry import Retry
+
+def get_query_retry(retries: int, backoff_factor: float = 0.5) -> Retry:
+    return Retry(total=retries,
+                 backoff_factor=backoff_factor,
+                 status_forcelist=[429, 500, 502, 503, 504],
+                 allowed_methods=["GET"],
+                 raise_on_status=False)
+
+def get_submission_retry(retries: int, backoff_factor: float = 0.5) -> Retry:
+    return Retry(total=retries,
+                 read=0,
+                 backoff_factor=backoff_factor,
+                 status_forcelist=[429, 503],
+                 allowed_methods=["POST"],
+                 raise_on_status=False)
+
+def create_session(api_key: str, jobs: int, retry: Retry) -> requests.Session:
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=jobs, max_retries=retry)
+
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {api_key}"
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+def load_best_scores() -> Dict[str, Any]:
+    best_scores_file = Path(__file__).parent.parent / "results" / "best.json"
+    if not best_scores_file.is_file():
+        return {}
+
+    return json.loads(best_scores_file.read_text(encoding="utf-8"))
+
+def save_best_scores(best_scores: Dict[str, Any]) -> None:
+    best_scores_file = Path(__file__).parent.parent / "results" / "best.json"
+
+    with best_scores_file.open("w+", encoding="utf-8") as file:
+        file.write(json.dumps(best_scores, indent=4))
+
+def get_results(session: requests.Session, api_url: str) -> Dict[str, Any]:
+    response = session.get(f"{api_url}/api/results/user")
+    response.raise_for_status()
+
+    return response.json()
+
+def submit(session: requests.Session, api_url: str, isl_file: Path) -> None:
+    content = isl_file.read_text(encoding="utf-8")
+
+    response = session.post(f"{api_url}/api/submissions/{isl_file.stem}/create",
+                            files={"file": ("submission.isl", StringIO(content))})
+    response.raise_for_status()
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Submit a painter's results.")
     parser.add_argument("painter", type=str, help="the painter to submit the results of")
     parser.add_argument("--image", type=int, help="the image to submit the results of (defaults to all images)")
+    parser.add_argument("--api-url", type=str, default="https://robovinci.xyz", help="the API to submit to (defaults to https://robovinci.xyz)")
+    parser.add_argument("--jobs", type=int, default=4, help="the number of concurrent submissions (defaults to 4)")
+    parser.add_argument("--retries", type=int, default=5, help="the number of retries per request (defaults to 5)")
+    parser.add_argument("--force", action="store_true", help="submit results that are not better than the best known score")
 
     args = parser.parse_args()
 
@@ -24,25 +84,53 @@ def main() -> None:
     else:
         submit_files = sorted(output_directory.glob("*.isl"), key=lambda file: int(file.stem))
 
+    query_session = create_session(os.environ["ICFPC_2022_API_KEY"], 1, get_query_retry(args.retries))
+    submission_session = create_session(os.environ["ICFPC_2022_API_KEY"], args.jobs, get_submission_retry(args.retries))
+
+    best_scores = load_best_scores()
+    api_scores = best_scores.setdefault(args.api_url, {})
+
+    for result in get_results(query_session, args.api_url)["results"]:
+        problem_id = str(result["problem_id"])
+        if result["min_cost"] > 0 and (problem_id not in api_scores or result["min_cost"] < api_scores[problem_id]["score"]):
+            api_scores[problem_id] = {"score": result["min_cost"], "painter": None}
+
+    pending_files = []
     for file in submit_files:
-        content = file.read_text(encoding="utf-8")
+        score = int((file.parent / f"{file.stem}.txt").read_text(encoding="utf-8"))
+        best_score = api_scores.get(file.stem, {}).get("score")
 
-        response = requests.post(f"https://robovinci.xyz/api/submissions/{file.stem}/create",
-                                 headers={"Authorization": f"Bearer {os.environ['ICFPC_2022_API_KEY']}"},
-                                 files={"file": ("submission.isl", StringIO(content))})
-        response.raise_for_status()
+        if args.force or best_score is None or score < best_score:
+            pending_files.append((file, score))
+        else:
+            print(f"Skipped {file.stem}, {score:,.0f} is not better than {best_score:,.0f}")
 
-        print(f"Successfully submitted {file.stem}")
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(submit, submission_session, args.api_url, file): (file, score) for file, score in pending_files}
 
-    time.sleep(1)
+        for future in as_completed(futures):
+            file, score = futures[future]
 
-    response = requests.get(f"https://robovinci.xyz/api/results/user",
-                            headers={"Authorization": f"Bearer {os.environ['ICFPC_2022_API_KEY']}"})
-    response.raise_for_status()
+            try:
+                future.result()
+            except requests.RequestException as e:
+                print(f"Failed to submit {file.stem}: {e}")
+                continue
+
+            if file.stem not in api_scores or score < api_scores[file.stem]["score"]:
+                api_scores[file.stem] = {"score": score, "painter": args.painter}
+                save_best_scores(best_scores)
+
+            print(f"Successfully submitted {file.stem} ({score:,.0f})")
+
+    save_best_scores(best_scores)
+
+    if len(pending_files) > 0:
+        time.sleep(1)
 
-    print(f"Total cost: {response.json()['total_cost']:,.0f}")
-    print("Dashboard: https://robovinci.xyz/dashboard")
-    print("Scoreboard: https://robovinci.xyz/scoreboard")
+    print(f"Total cost: {get_results(query_session, args.api_url)['total_cost']:,.0f}")
+    print(f"Dashboard: {args.api_url}/dashboard")
+    print(f"Scoreboard: {args.api_url}/scoreboard")
 
 if __name__ == "__main__":
     main()
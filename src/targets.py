@@ -0,0 +1,95 @@
+import argparse
+import numpy as np
+import os
+import tempfile
+from pathlib import Path
+from PIL import Image
+from typing import Dict, Optional
+
+PLANES = ["rgba", "packed"]
+
+mapped_planes = {}
+
+def get_targets_directory() -> Path:
+    return Path(__file__).parent.parent / "results" / "targets"
+
+def get_plane_file(image_file: Path, plane: str) -> Path:
+    return get_targets_directory() / f"{image_file.stem}.{plane}.npy"
+
+def pack_colors(pixels: np.ndarray) -> np.ndarray:
+    pixels = pixels.astype(np.uint32)
+    return (pixels[..., 0] << 24) | (pixels[..., 1] << 16) | (pixels[..., 2] << 8) | pixels[..., 3]
+
+def create_planes(image_file: Path) -> Dict[str, np.ndarray]:
+    pixels = np.ascontiguousarray(np.flip(np.array(Image.open(image_file)), 0))
+    return {"rgba": pixels, "packed": pack_colors(pixels)}
+
+def preprocess(image_file: Path, force: bool = False) -> bool:
+    image_mtime = image_file.stat().st_mtime_ns
+    if not force and all(get_plane_file(image_file, plane).is_file() and get_plane_file(image_file, plane).stat().st_mtime_ns >= image_mtime
+                         for plane in PLANES):
+        return False
+
+    targets_directory = get_targets_directory()
+    targets_directory.mkdir(parents=True, exist_ok=True)
+
+    for plane, array in create_planes(image_file).items():
+        with tempfile.NamedTemporaryFile(dir=targets_directory, suffix=".npy", delete=False) as file:
+            np.save(file, array)
+
+        os.replace(file.name, get_plane_file(image_file, plane))
+
+    return True
+
+def load_plane(image_file: Path, plane: str) -> np.ndarray:
+    key = (str(image_file), plane)
+    image_mtime = image_file.stat().st_mtime_ns
+
+    if key in mapped_planes and mapped_planes[key][0] == image_mtime:
+        return mapped_planes[key][1]
+
+    preprocess(image_file)
+
+    array = np.load(get_plane_file(image_file, plane), mmap_mode="r")
+    mapped_planes[key] = (image_mtime, array)
+
+    return array
+
+def get_image_file(target_image: Image.Image) -> Optional[Path]:
+    filename = getattr(target_image, "filename", "")
+    if filename == "":
+        return None
+
+    image_file = Path(filename).resolve()
+    if image_file.parent != (Path(__file__).parent.parent / "results" / "input").resolve() or not image_file.is_file():
+        return None
+
+    return image_file
+
+def get_target_pixels(target_image: Image.Image) -> np.ndarray:
+    image_file = get_image_file(target_image)
+    if image_file is None:
+        return np.flip(np.array(target_image), 0)
+
+    return load_plane(image_file, "rgba")
+
+def get_packed_pixels(target_image: Image.Image) -> Optional[np.ndarray]:
+    image_file = get_image_file(target_image)
+    if image_file is None:
+        return None
+
+    return load_plane(image_file, "packed")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write the flipped and packed pixels of the targets to results/targets.")
+    parser.add_argument("--force", action="store_true", help="rewrite targets that are up-to-date")
+
+    args = parser.parse_args()
+
+    image_files = sorted((Path(__file__).parent.parent / "results" / "input").glob("*.png"), key=lambda file: int(file.stem))
+
+    written_files = sum(preprocess(image_file, args.force) for image_file in image_files)
+    print(f"Preprocessed {written_files:,.0f} targets, {len(image_files) - written_files:,.0f} up-to-date")
+
+if __name__ == "__main__":
+    main()
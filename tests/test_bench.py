@@ -0,0 +1,26 @@
+from bench import drop_changed_programs, find_regressions
+
+def test_changed_programs_are_not_compared() -> None:
+    baseline = {
+        "get_score": {"1": {"v1": 0.01, "v2": 0.01}},
+        "programs": {"1": {"v1": "a", "v2": "b"}}
+    }
+    results = {
+        "get_score": {"1": {"v1": 0.02, "v2": 0.02}},
+        "programs": {"1": {"v1": "a", "v2": "c"}}
+    }
+
+    compared_results = drop_changed_programs(results, baseline)
+
+    assert compared_results == {"get_score": {"1": {"v1": 0.02}}}
+    assert find_regressions(compared_results, baseline, 0.1) == [("get_score/1/v1", 0.01, 0.02)]
+
+def test_baseline_without_program_hashes_skips_get_score() -> None:
+    baseline = {"apply_move": {"ColorMove": 0.01}, "get_score": {"1": 0.01}}
+    results = {
+        "apply_move": {"ColorMove": 0.02},
+        "get_score": {"1": {"v1": 0.02}},
+        "programs": {"1": {"v1": "a"}}
+    }
+
+    assert find_regressions(drop_changed_programs(results, baseline), baseline, 0.1) == [("apply_move/ColorMove", 0.01, 0.02)]
@@ -0,0 +1,73 @@
+import core
+import json
+import numpy as np
+import pytest
+from core import Canvas, Color, ColorMove, LineCutMove, Orientation, PointCutMove, evaluate_candidates
+from pathlib import Path
+from PIL import Image
+
+INPUT_DIRECTORY = Path(__file__).parent.parent / "results" / "input"
+
+@pytest.fixture
+def canvas() -> Canvas:
+    image = Image.open(INPUT_DIRECTORY / "1.png")
+    initial_config = json.loads((INPUT_DIRECTORY / "1.json").read_text(encoding="utf-8"))
+
+    canvas = Canvas(initial_config, image)
+    canvas.apply_move(LineCutMove("0", Orientation.VERTICAL, 200))
+    canvas.apply_move(ColorMove("0.0", Color(10, 20, 30, 255)))
+
+    yield canvas
+
+    core.shutdown_executors()
+
+def get_candidates(seed: int, count: int) -> list:
+    rng = np.random.default_rng(seed)
+
+    candidates = []
+    for _ in range(count):
+        x, y = int(rng.integers(201, 399)), int(rng.integers(1, 399))
+        colors = [Color(*(int(value) for value in rng.integers(0, 256, 4))) for _ in range(2)]
+        candidates.append([PointCutMove("0.1", x, y), ColorMove("0.1.0", colors[0]), ColorMove("0.1.2", colors[1])])
+
+    return candidates
+
+def test_parallel_scores_match_serial(canvas: Canvas) -> None:
+    candidates = get_candidates(0, 7)
+
+    serial_scores, serial_best = evaluate_candidates(canvas, candidates, jobs=1)
+    parallel_scores, parallel_best = evaluate_candidates(canvas, candidates, jobs=2)
+
+    assert parallel_scores == serial_scores
+    assert parallel_best == serial_best
+
+def test_evaluation_leaves_canvas_unchanged(canvas: Canvas) -> None:
+    score = canvas.get_score()
+    pixels = canvas.pixels.copy()
+
+    evaluate_candidates(canvas, get_candidates(1, 4), jobs=2)
+    evaluate_candidates(canvas, get_candidates(1, 4), jobs=1)
+
+    assert canvas.get_score() == score
+    np.testing.assert_array_equal(canvas.pixels, pixels)
+
+def test_executors_are_reused_and_shut_down(canvas: Canvas) -> None:
+    evaluate_candidates(canvas, get_candidates(2, 3), jobs=2)
+    executor = core.executors[2][1]
+
+    evaluate_candidates(canvas, get_candidates(3, 5), jobs=2)
+    assert core.executors[2][1] is executor
+    assert len(core.executors) == 1
+
+    core.shutdown_executors()
+    assert len(core.executors) == 0
+
+def test_executor_is_replaced_for_a_new_target(canvas: Canvas) -> None:
+    evaluate_candidates(canvas, get_candidates(4, 3), jobs=2)
+    executor = core.executors[2][1]
+
+    other_canvas = Canvas(json.loads((INPUT_DIRECTORY / "2.json").read_text(encoding="utf-8")), Image.open(INPUT_DIRECTORY / "2.png"))
+    evaluate_candidates(other_canvas, [[ColorMove("0", Color(0, 0, 0, 255))], [ColorMove("0", Color(255, 255, 255, 255))]], jobs=2)
+
+    assert core.executors[2][1] is not executor
+    assert len(core.executors) == 1
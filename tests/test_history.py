@@ -0,0 +1,44 @@
+import history
+import pytest
+import sqlite3
+
+@pytest.fixture
+def connection() -> sqlite3.Connection:
+    connection = history.create_connection(":memory:")
+    yield connection
+    connection.close()
+
+def test_latest_scores_use_most_recent_run(connection: sqlite3.Connection) -> None:
+    history.record_run(connection, "v1", "1", 100)
+    history.record_run(connection, "v1", "1", 120, 20, 100, 3, 0.5, "abc")
+    history.record_run(connection, "v1", "2", 50)
+    history.record_run(connection, "v2", "1", 90)
+
+    assert history.get_latest_scores(connection) == {"v1": {"1": 120, "2": 50}, "v2": {"1": 90}}
+
+def test_best_runs_pick_lowest_latest_score_per_image(connection: sqlite3.Connection) -> None:
+    history.record_run(connection, "v1", "1", 80)
+    history.record_run(connection, "v1", "1", 100)
+    history.record_run(connection, "v2", "1", 90)
+    history.record_run(connection, "v1", "10", 30)
+    history.record_run(connection, "v2", "10", 30)
+    history.record_run(connection, "v2", "2", 70)
+
+    best_runs = history.get_best_runs(connection)
+
+    assert [(run["image"], run["painter"], run["score"]) for run in best_runs] == [("1", "v2", 90), ("2", "v2", 70), ("10", "v1", 30)]
+
+def test_record_run_stores_details(connection: sqlite3.Connection) -> None:
+    history.record_run(connection, "v1", "1", 120, 20, 100, 3, 0.5, "abc")
+
+    [run] = history.get_image_history(connection, "v1", "1")
+    assert (run["score"], run["cost"], run["similarity"], run["moves"], run["runtime"], run["painter_hash"]) == (120, 20, 100, 3, 0.5, "abc")
+
+def test_record_run_commits(tmp_path) -> None:
+    database = str(tmp_path / "history.db")
+
+    connection = history.create_connection(database)
+    history.record_run(connection, "v1", "1", 100)
+    connection.close()
+
+    assert history.get_latest_scores(history.create_connection(database)) == {"v1": {"1": 100}}
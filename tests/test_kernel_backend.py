@@ -0,0 +1,19 @@
+import kernels
+import pytest
+
+def test_default_backend_prefers_numba() -> None:
+    assert kernels.get_backend(None) == ("numba" if kernels.numba is not None else "numpy")
+    assert kernels.get_backend("") == kernels.get_backend(None)
+
+def test_explicit_backend() -> None:
+    assert kernels.get_backend("numpy") == "numpy"
+
+def test_unknown_backend_raises() -> None:
+    with pytest.raises(RuntimeError, match="Unsupported kernel backend: cuda"):
+        kernels.get_backend("cuda")
+
+def test_missing_numba_falls_back_to_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(kernels, "numba", None)
+
+    with pytest.warns(UserWarning, match="falling back"):
+        assert kernels.get_backend("numba") == "numpy"
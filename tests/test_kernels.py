@@ -0,0 +1,67 @@
+import kernels
+import numpy as np
+import pytest
+
+pytestmark = pytest.mark.skipif(kernels.numba is None, reason="numba is not installed")
+
+SIZE = 64
+ITERATIONS = 200
+
+def get_rectangle(rng: np.random.Generator) -> tuple:
+    width, height = int(rng.integers(1, SIZE + 1)), int(rng.integers(1, SIZE + 1))
+    return int(rng.integers(0, SIZE - width + 1)), int(rng.integers(0, SIZE - height + 1)), width, height
+
+def get_swap_rectangles(rng: np.random.Generator) -> tuple:
+    width, height = int(rng.integers(1, SIZE // 2 + 1)), int(rng.integers(1, SIZE + 1))
+    x1, y1 = int(rng.integers(0, SIZE - 2 * width + 1)), int(rng.integers(0, SIZE - height + 1))
+    x2, y2 = int(rng.integers(x1 + width, SIZE - width + 1)), int(rng.integers(0, SIZE - height + 1))
+
+    return x1, y1, x2, y2, width, height
+
+def check_backends_match(seed: int, kernel: str) -> None:
+    rng = np.random.default_rng(seed)
+
+    pixels = rng.integers(0, 256, (SIZE, SIZE, 4), dtype=np.uint8)
+    target_pixels = rng.integers(0, 256, (SIZE, SIZE, 4), dtype=np.uint8)
+    distances = np.sqrt(((pixels.astype(np.int32) - target_pixels.astype(np.int32)) ** 2).sum(axis=2))
+
+    states = {backend: [pixels.copy(), distances.copy(), distances.sum()] for backend in kernels.BACKENDS}
+
+    for _ in range(ITERATIONS):
+        if kernel == "fill":
+            arguments = get_rectangle(rng) + (rng.integers(0, 256, 4, dtype=np.uint8),)
+        elif kernel == "swap":
+            arguments = get_swap_rectangles(rng)
+        else:
+            arguments = get_rectangle(rng)
+
+            x, y, width, height = get_rectangle(rng)
+            noise = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+            for state in states.values():
+                state[0][y:y + height, x:x + width] = noise
+
+        deltas = {}
+        for backend, state in states.items():
+            deltas[backend] = getattr(kernels, f"{kernel}_{backend}")(state[0], target_pixels, state[1], *arguments)
+            state[2] += deltas[backend]
+
+        assert deltas["numba"] == pytest.approx(deltas["numpy"], rel=1e-9, abs=1e-6)
+
+    np.testing.assert_array_equal(states["numba"][0], states["numpy"][0])
+    np.testing.assert_allclose(states["numba"][1], states["numpy"][1], rtol=0, atol=1e-9)
+    assert states["numba"][2] == pytest.approx(states["numpy"][2], rel=1e-9)
+
+    if kernel != "update_distances":
+        assert states["numba"][2] == pytest.approx(states["numba"][1].sum(), rel=1e-9)
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fill_matches_numpy(seed: int) -> None:
+    check_backends_match(seed, "fill")
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_swap_matches_numpy(seed: int) -> None:
+    check_backends_match(seed, "swap")
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_update_distances_matches_numpy(seed: int) -> None:
+    check_backends_match(seed, "update_distances")
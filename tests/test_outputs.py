@@ -0,0 +1,15 @@
+import pytest
+import run
+from pathlib import Path
+
+RESULTS_DIRECTORY = Path(__file__).parent.parent / "results"
+
+@pytest.mark.parametrize("painter_name", ["v2", "v5", "v6"])
+def test_committed_outputs_match_painter(painter_name: str, tmp_path: Path) -> None:
+    image_file = RESULTS_DIRECTORY / "input" / "2.png"
+    output_directory = RESULTS_DIRECTORY / "output" / painter_name
+
+    result = run.solve(painter_name, image_file, tmp_path)
+
+    assert (tmp_path / "2.isl").read_text(encoding="utf-8") == (output_directory / "2.isl").read_text(encoding="utf-8")
+    assert int(result["score"]) == int((output_directory / "2.txt").read_text(encoding="utf-8"))
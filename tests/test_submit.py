@@ -0,0 +1,68 @@
+import pytest
+import random
+import requests
+import threading
+from fake_api import FakeApiHandler, FakeApiState
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from submit import create_session, get_query_retry, get_results, get_submission_retry, submit
+
+OUTPUT_DIRECTORY = Path(__file__).parent.parent / "results" / "output" / "v1"
+IMAGES = [1, 2, 3, 4, 5]
+
+class QuietFakeApiHandler(FakeApiHandler):
+    def log_message(self: "QuietFakeApiHandler", *args) -> None:
+        pass
+
+@pytest.fixture
+def fake_api():
+    def start(failure_rate: float, failure_status: int = 503):
+        QuietFakeApiHandler.state = FakeApiState(failure_rate, failure_status)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), QuietFakeApiHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+        return f"http://127.0.0.1:{server.server_address[1]}", QuietFakeApiHandler.state
+
+    servers = []
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_submissions_are_accepted_once_despite_failures(fake_api) -> None:
+    random.seed(0)
+    api_url, state = fake_api(0.3)
+
+    submission_session = create_session("key", 2, get_submission_retry(20, backoff_factor=0))
+    for image in IMAGES:
+        submit(submission_session, api_url, OUTPUT_DIRECTORY / f"{image}.isl")
+
+    query_session = create_session("key", 1, get_query_retry(20, backoff_factor=0))
+    results = get_results(query_session, api_url)
+
+    assert [result["problem_id"] for result in results["results"]] == IMAGES
+    assert all(result["submission_count"] == 1 for result in results["results"])
+    assert results["total_cost"] == sum(int((OUTPUT_DIRECTORY / f"{image}.txt").read_text(encoding="utf-8")) for image in IMAGES)
+    assert state.request_count > len(IMAGES) + 1
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_submissions_are_not_retried_after_server_errors(fake_api, status: int) -> None:
+    api_url, state = fake_api(1.0, status)
+
+    session = create_session("key", 1, get_submission_retry(5, backoff_factor=0))
+    with pytest.raises(requests.HTTPError):
+        submit(session, api_url, OUTPUT_DIRECTORY / "1.isl")
+
+    assert state.request_count == 1
+
+def test_queries_are_retried_after_server_errors(fake_api) -> None:
+    api_url, state = fake_api(1.0, 500)
+
+    session = create_session("key", 1, get_query_retry(3, backoff_factor=0))
+    with pytest.raises(requests.HTTPError):
+        get_results(session, api_url)
+
+    assert state.request_count == 4
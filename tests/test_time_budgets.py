@@ -0,0 +1,42 @@
+import history
+import pytest
+import run
+import sqlite3
+from pathlib import Path
+
+@pytest.fixture
+def connection() -> sqlite3.Connection:
+    connection = history.create_connection(":memory:")
+    yield connection
+    connection.close()
+
+def get_image_files(*stems: str) -> list:
+    return [Path(f"{stem}.png") for stem in stems]
+
+def test_budget_follows_gap_to_best_score(connection: sqlite3.Connection) -> None:
+    history.record_run(connection, "v5", "1", 1000)
+    history.record_run(connection, "v5", "2", 1000)
+    history.record_run(connection, "v5", "3", 500)
+    history.record_run(connection, "v6", "1", 800)
+    history.record_run(connection, "v6", "2", 900)
+
+    time_budgets = run.get_time_budgets(connection, "v5", get_image_files("1", "2", "3"), 31, 1)
+
+    assert time_budgets == pytest.approx({"1": 20, "2": 10, "3": 1})
+
+def test_tied_and_unseen_images_still_get_time(connection: sqlite3.Connection) -> None:
+    history.record_run(connection, "v5", "1", 1000)
+    history.record_run(connection, "v5", "2", 500)
+    history.record_run(connection, "v6", "1", 800)
+    history.record_run(connection, "v6", "2", 600)
+
+    time_budgets = run.get_time_budgets(connection, "v5", get_image_files("1", "2", "3"), 31, 1)
+
+    assert time_budgets == pytest.approx({"1": 20, "2": 1, "3": 10})
+
+def test_budget_is_split_evenly_without_gaps(connection: sqlite3.Connection) -> None:
+    history.record_run(connection, "v5", "1", 1000)
+
+    time_budgets = run.get_time_budgets(connection, "v5", get_image_files("1", "2"), 10, 2)
+
+    assert time_budgets == pytest.approx({"1": 10, "2": 10})